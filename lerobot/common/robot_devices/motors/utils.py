@@ -12,6 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import array
+import select
+import sys
 from typing import Protocol
 
 from lerobot.common.robot_devices.motors.configs import (
@@ -65,3 +68,106 @@ def make_motors_bus(motor_type: str, **kwargs) -> MotorsBus:
 
     else:
         raise ValueError(f"The motor type '{motor_type}' is not valid.")
+
+
+# Linux serial ioctls, used to put USB-serial adapters in low latency mode
+TIOCGSERIAL = 0x541E
+TIOCSSERIAL = 0x541F
+ASYNC_LOW_LATENCY = 0x2000
+
+
+def set_low_latency(motors_bus):
+    """Put the serial port of a connected motors bus in low latency mode.
+
+    FTDI adapters otherwise buffer the replies for their 16ms latency timer, which bounds every
+    read/write round trip regardless of the baudrate. Only supported on Linux, elsewhere (or when the
+    driver does not support it) the port is left as is.
+    """
+    if not sys.platform.startswith("linux"):
+        return
+    import fcntl
+
+    try:
+        fd = motors_bus.port_handler.ser.fileno()
+        # struct serial_struct, its int flags field comes after the type, line, port and irq ints
+        buf = array.array("i", [0] * 32)
+        fcntl.ioctl(fd, TIOCGSERIAL, buf)
+        buf[4] |= ASYNC_LOW_LATENCY
+        fcntl.ioctl(fd, TIOCSSERIAL, buf)
+    except (AttributeError, OSError) as e:
+        print(f"Could not set low latency mode on port {motors_bus.port}: {e}")
+
+
+def use_select_reads(motors_bus):
+    """Make the reads of a connected motors bus wait for the reply bytes with select().
+
+    The SDK opens the port non-blocking and busy-polls it until a reply arrives or the packet timeout
+    elapses. Waiting in select() instead wakes up as soon as bytes arrive, without spinning a core.
+    """
+    port_handler = motors_bus.port_handler
+    ser = port_handler.ser
+    try:
+        fd = ser.fileno()
+    except (AttributeError, OSError):
+        return
+
+    def read_port(length):
+        data = ser.read(length)
+        if not data:
+            # Packet timeouts are in ms
+            remaining = (port_handler.packet_timeout - port_handler.getTimeSinceStart()) / 1000
+            if remaining > 0:
+                select.select([fd], [], [], remaining)
+                data = ser.read(length)
+        return data
+
+    port_handler.readPort = read_port
+
+
+def resolve_register_block(motors_bus, motor_name, data_names):
+    """Resolve the READ covering several registers of a Feetech motor, to be read by `read_register_block`.
+
+    The block spans from the lowest to the highest of the registers, so they do not have to be
+    adjacent. It can be resolved once and read many times.
+
+    Returns:
+        tuple: (motor ID, start address, length, tuple of (register name, offset in the block, bytes))
+    """
+    motor_id, model = motors_bus.motors[motor_name]
+    ctrl_table = motors_bus.model_ctrl_table[model]
+    start = min(ctrl_table[name][0] for name in data_names)
+    end = max(ctrl_table[name][0] + ctrl_table[name][1] for name in data_names)
+    layout = tuple((name, ctrl_table[name][0] - start, ctrl_table[name][1]) for name in data_names)
+    return motor_id, start, end - start, layout
+
+
+def read_register_block(motors_bus, block, num_retry=20):
+    """Read a block resolved by `resolve_register_block` with a single READ instruction.
+
+    Goes straight to the packet handler, without the per-call register and model lookups of
+    `motors_bus.read`. Returns a dict of register name to raw value.
+    """
+    if motors_bus.mock:
+        import tests.motors.mock_scservo_sdk as scs
+    else:
+        import scservo_sdk as scs
+
+    motor_id, start, length, layout = block
+    for _ in range(num_retry):
+        data, comm, _ = motors_bus.packet_handler.readTxRx(motors_bus.port_handler, motor_id, start, length)
+        if comm == scs.COMM_SUCCESS:
+            break
+
+    if comm != scs.COMM_SUCCESS:
+        raise ConnectionError(
+            f"Read failed due to communication error on port {motors_bus.port} for motor ID {motor_id}: "
+            f"{motors_bus.packet_handler.getTxRxResult(comm)}"
+        )
+
+    values = {}
+    for name, offset, bytes in layout:
+        if bytes == 1:
+            values[name] = data[offset]
+        else:
+            values[name] = scs.SCS_MAKEWORD(data[offset], data[offset + 1])
+    return values
@@ -0,0 +1,23 @@
+"""Compile the normalization kernels ahead of time into the `normalization_aot` extension.
+
+Run once on the machine controlling the robot (and again after changing the kernels):
+
+    python build_kernels.py
+
+`normalization.py` then imports the compiled kernels instead of JIT compiling them at startup.
+"""
+import os
+
+from numba.pycc import CC
+
+from normalization import AFFINE_SIGNATURE, CLIP_AFFINE_SIGNATURE, affine_kernel, clip_affine_kernel
+
+cc = CC("normalization_aot")
+cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+cc.export("affine", AFFINE_SIGNATURE)(affine_kernel)
+cc.export("clip_affine", CLIP_AFFINE_SIGNATURE)(clip_affine_kernel)
+
+
+if __name__ == "__main__":
+    cc.compile()
+    print(f"Compiled the normalization kernels into {cc.output_dir}")
@@ -1,13 +1,127 @@
 import cv2
 import numpy as np
 
+# Reusable buffers for the combined displays, reallocated only when the frame shapes change
+_display_canvas = None
+_grid_canvas = None
+# Views on `_grid_canvas`, one per tile, rebuilt only when the grid layout changes
+_grid_tiles = []
+_grid_layout = None
+# Names of the windows already created by `create_display_window`
+_created_windows = set()
 
-def display_camera_feeds(images, wait_key=1000):
+
+def _get_canvas(canvas, shape, dtype):
+    """Return `canvas` if it matches the requested shape and dtype, otherwise allocate a new one."""
+    if canvas is None or canvas.shape != shape or canvas.dtype != dtype:
+        canvas = np.empty(shape, dtype=dtype)
+    return canvas
+
+
+def create_display_window(name):
+    """Create a display window once, with OpenGL rendering when OpenCV supports it.
+    
+    Later calls with the same name do nothing, so this can be called before every imshow.
+    
+    Args:
+        name: Name of the window
+    """
+    if name in _created_windows:
+        return
+    try:
+        cv2.namedWindow(name, cv2.WINDOW_OPENGL | cv2.WINDOW_AUTOSIZE)
+    except cv2.error:
+        # OpenCV built without OpenGL support
+        cv2.namedWindow(name, cv2.WINDOW_AUTOSIZE)
+    _created_windows.add(name)
+
+
+def compose_camera_grid(displays, num_cols=2):
+    """Arrange camera images in a grid inside a reusable canvas.
+    
+    Every tile takes the size of the first image; images with a different size are resized
+    directly into their tile, so no intermediate row or grid arrays are allocated.
+    
+    Args:
+        displays: List of images to arrange, row by row
+        num_cols: Maximum number of images per row (default: 2)
+    
+    Returns:
+        numpy.ndarray: The combined image (a view on the shared canvas, overwritten on the next call)
+    """
+    global _grid_canvas, _grid_tiles, _grid_layout
+    
+    if len(displays) == 1:
+        return displays[0]
+    
+    tile_h, tile_w = displays[0].shape[:2]
+    num_cols = min(num_cols, len(displays))
+    num_rows = (len(displays) + num_cols - 1) // num_cols
+    shape = (num_rows * tile_h, num_cols * tile_w) + displays[0].shape[2:]
+    
+    layout = (shape, displays[0].dtype, len(displays))
+    if layout != _grid_layout:
+        # Zeroed so the slot left empty at the end of the last row stays black
+        _grid_canvas = np.zeros(shape, dtype=displays[0].dtype)
+        _grid_tiles = []
+        for i in range(len(displays)):
+            row, col = divmod(i, num_cols)
+            _grid_tiles.append(_grid_canvas[row * tile_h:(row + 1) * tile_h, col * tile_w:(col + 1) * tile_w])
+        _grid_layout = layout
+    
+    for tile, img in zip(_grid_tiles, displays, strict=True):
+        if img.shape == tile.shape:
+            np.copyto(tile, img)
+        else:
+            cv2.resize(img, (tile_w, tile_h), dst=tile)
+    
+    return _grid_canvas
+
+
+def configure_low_latency(cap):
+    """Limit an OpenCV capture's internal frame queue to a single frame.
+    
+    V4L2 queues several frames by default, so a read can return a frame that is already a few
+    frame periods old. With a queue of one, reads always return the most recent frame.
+    
+    Args:
+        cap: The `cv2.VideoCapture` of a camera
+    
+    Returns:
+        bool: True if the backend accepted the setting, False otherwise
+    """
+    if not isinstance(cap, cv2.VideoCapture):
+        return False
+    return cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+
+def make_bgr_converter(frame):
+    """Build a function converting frames shaped like `frame` to 3-channel BGR images.
+    
+    A camera's output format does not change mid-stream, so the decision is made once from its first frame.
+    Grayscale frames are converted into a buffer allocated once and reused on every call;
+    color frames are returned as is.
+    
+    Args:
+        frame: A first frame from the camera
+    
+    Returns:
+        Callable taking a frame and returning the BGR image
+    """
+    if frame.ndim == 2:
+        bgr_buffer = np.empty(frame.shape + (3,), dtype=frame.dtype)
+        return lambda img: cv2.cvtColor(img, cv2.COLOR_GRAY2BGR, dst=bgr_buffer)
+    return lambda img: img
+
+
+def display_camera_feeds(images, wait_key=1, blocking=False):
     """Display camera feeds using OpenCV.
     
     Args:
         images: Dictionary with camera images (exterior, wrist)
-        wait_key: Time to wait for key press in milliseconds (default: 1 second)
+        wait_key: Time to wait for key press in milliseconds when blocking (default: 1, 0 waits forever)
+        blocking: Prompt the user and wait up to `wait_key` for a key press before continuing
+            (default: False, only pump the window events for 1 ms)
     
     Returns:
         True if user wants to continue, False to exit
@@ -17,17 +131,28 @@ def display_camera_feeds(images, wait_key=1000):
         print("No camera feeds available to display")
         return True
     
+    global _display_canvas
+    
     # Create a combined display
     if "exterior_image_1_left" in images and "wrist_image_left" in images:
-        # Create a horizontal stack of both images
-        display_img = np.hstack((images["exterior_image_1_left"], images["wrist_image_left"]))
+        exterior_img = images["exterior_image_1_left"]
+        wrist_img = images["wrist_image_left"]
+        
+        # Copy both images side by side into the reusable canvas instead of allocating a new stack
+        h, w = exterior_img.shape[:2]
+        shape = (h, w + wrist_img.shape[1]) + exterior_img.shape[2:]
+        _display_canvas = _get_canvas(_display_canvas, shape, exterior_img.dtype)
+        display_img = _display_canvas
+        np.copyto(display_img[:, :w], exterior_img)
+        np.copyto(display_img[:, w:], wrist_img)
         
         # Add labels to identify each camera
         font = cv2.FONT_HERSHEY_SIMPLEX
         cv2.putText(display_img, "Exterior Camera", (10, 30), font, 1, (0, 255, 0), 2)
-        cv2.putText(display_img, "Wrist Camera", (display_img.shape[1]//2 + 10, 30), font, 1, (0, 255, 0), 2)
+        cv2.putText(display_img, "Wrist Camera", (w + 10, 30), font, 1, (0, 255, 0), 2)
         
         # Display the combined image
+        create_display_window("Robot Camera Feeds")
         cv2.imshow("Robot Camera Feeds", display_img)
     else:
         # Display whichever image is available
@@ -36,11 +161,15 @@ def display_camera_feeds(images, wait_key=1000):
         if "wrist_image_left" in images:
             cv2.imshow("Wrist Camera", images["wrist_image_left"])
     
-    print("Press any key in the camera window to continue, or 'q' to exit")
+    if blocking:
+        print("Press any key in the camera window to continue, or 'q' to exit")
+    else:
+        wait_key = 1
+    
     # Wait for key press, exit if 'q' is pressed
     key = cv2.waitKey(wait_key)
     if key == ord('q'):
-        cv2.destroyAllWindows()
+        cleanup_display()
         return False
     
     return True
@@ -48,4 +177,5 @@ def display_camera_feeds(images, wait_key=1000):
 
 def cleanup_display():
     """Clean up and close all OpenCV windows."""
+    _created_windows.clear()
     cv2.destroyAllWindows() 
\ No newline at end of file
@@ -1,15 +1,18 @@
 import time
 import argparse
+import logging
+from concurrent.futures import ThreadPoolExecutor
 
 # Import modules from our own files
-from robot_interface import initialize_robot, capture_robot_data
-from camera_utils import display_camera_feeds, cleanup_display
-from pi0_client import create_pi0_client, send_to_pi0
+from robot_interface import initialize_robot, capture_robot_data, get_camera_images, LatestObservation
+from camera_utils import (
+    display_camera_feeds, cleanup_display, compose_camera_grid, create_display_window, make_bgr_converter
+)
+from pi0_client import DEFAULT_JPEG_QUALITY, create_pi0_client, send_to_pi0, send_to_pi0_async
 from motor_control import apply_robot_action
 
-# Import OpenCV and NumPy
+# Import OpenCV
 import cv2
-import numpy as np
 
 def parse_args():
     """Parse command-line arguments."""
@@ -32,70 +35,79 @@ def parse_args():
     parser.add_argument('--control-hz', type=float, default=20,
                         help='Control frequency in Hz for trajectory execution (default: 20)')
     
+    # Per-step logging during trajectory execution
+    parser.add_argument('--verbose', action='store_true',
+                        help='Log per-step details during trajectory execution and the captured robot state')
+    
     # Server connection
     parser.add_argument('--host', type=str, default='localhost',
                         help='Pi0 server host (default: localhost)')
     parser.add_argument('--port', type=int, default=9000,
                         help='Pi0 server port (default: 9000)')
     
+    # Headless runs
+    parser.add_argument('--no-display', action='store_true',
+                        help='Do not display the camera feeds in the Pi0 modes')
+    
+    # Image encoding for the requests to the Pi0 server
+    parser.add_argument('--jpeg-quality', type=int, nargs='?', const=DEFAULT_JPEG_QUALITY, default=None,
+                        help='Send camera images to Pi0 as JPEG of this quality (0-100, '
+                             f'{DEFAULT_JPEG_QUALITY} if no value is given) instead of raw arrays. '
+                             'The server must decode them (default: raw arrays)')
+    
     # Prompt for Pi0 model
     parser.add_argument('--prompt', type=str, default='Pick up the duck',
                         help='Prompt for the Pi0 model (default: "Pick up the duck")')
     
     return parser.parse_args()
 
+def display_observation(observation):
+    """Display the camera images of a Pi0 observation."""
+    display_camera_feeds({
+        "exterior_image_1_left": observation["observation/exterior_image_1_left"],
+        "wrist_image_left": observation["observation/wrist_image_left"],
+    })
+
+
 # Run a single trajectory
-def single_trajectory_mode(args):
+def single_trajectory_mode(args, robot, client):
     """Main function to run the robot-Pi0 integration."""
-    # Connect to Pi0 model
-    client = create_pi0_client(host=args.host, port=args.port)
-    
-    robot = None
     try:
-        # Initialize robot
-        robot = initialize_robot()
-        
-        # Capture robot data with camera display enabled
-        observation = capture_robot_data(robot, display_function=display_camera_feeds, prompt=args.prompt)
+        # Capture robot data
+        observation = capture_robot_data(robot, prompt=args.prompt, verbose=args.verbose)
         
-        # Send to Pi0 model
-        response = send_to_pi0(client, observation)
+        # Send to Pi0 model and display the camera feeds while it computes
+        future = send_to_pi0_async(client, observation, jpeg_quality=args.jpeg_quality, verbose=args.verbose)
+        if not args.no_display:
+            display_observation(observation)
+        response = future.result()
         
         # Apply action to robot (executes full trajectory)
-        apply_robot_action(robot, response, hz=args.control_hz)
+        apply_robot_action(robot, response, hz=args.control_hz, verbose=args.verbose)
         
     finally:
         # Close any open windows
         cleanup_display()
-        
-        # Ensure robot is disconnected properly
-        if robot and robot.is_connected:
-            print("Disconnecting from SO100 robot...")
-            robot.disconnect()
-            print("Robot disconnected")
 
 
 # Run a specified number of trajectories with user confirmation between each
-def trajectory_mode(args):
+def trajectory_mode(args, robot, client):
     """Run a specified number of trajectories with user confirmation between each."""
-    client = create_pi0_client(host=args.host, port=args.port)
-    
-    robot = None
     try:
-        # Initialize robot
-        robot = initialize_robot()
-        
         trajectory_count = 0
         
         while args.num_trajectories == -1 or trajectory_count < args.num_trajectories:
-            # Capture robot data with camera display enabled
-            observation = capture_robot_data(robot, display_function=display_camera_feeds, prompt=args.prompt)
+            # Capture robot data
+            observation = capture_robot_data(robot, prompt=args.prompt, verbose=args.verbose)
             
-            # Send to Pi0 model
-            response = send_to_pi0(client, observation)
+            # Send to Pi0 model and display the camera feeds while it computes
+            future = send_to_pi0_async(client, observation, jpeg_quality=args.jpeg_quality, verbose=args.verbose)
+            if not args.no_display:
+                display_observation(observation)
+            response = future.result()
             
             # Apply full trajectory to robot
-            apply_robot_action(robot, response, hz=args.control_hz)
+            apply_robot_action(robot, response, hz=args.control_hz, verbose=args.verbose)
             
             trajectory_count += 1
             
@@ -108,83 +120,102 @@ def trajectory_mode(args):
     finally:
         # Close any open windows
         cleanup_display()
-        
-        # Ensure robot is disconnected properly
-        if robot and robot.is_connected:
-            print("Disconnecting from SO100 robot...")
-            robot.disconnect()
-            print("Robot disconnected")
 
 
 # Run in continuous mode to control the robot using Pi0 model
-def continuous_control_mode(args):
+def continuous_control_mode(args, robot, client):
     """Run in continuous mode to control the robot using Pi0 model."""
-    client = create_pi0_client(host=args.host, port=args.port)
-    
-    robot = None
+    latest = None
+    # Single worker so at most one Pi0 request is in flight and the client is only used from one thread
+    inference_pool = ThreadPoolExecutor(max_workers=1)
     try:
-        # Initialize robot
-        robot = initialize_robot()
+        # Keep capturing observations in the background so the policy always gets a fresh one
+        latest = LatestObservation(robot)
+        latest.start()
+        
+        def infer_next_trajectory():
+            # Runs in the worker thread: OpenCV windows are only handled from the main thread
+            request_start = time.monotonic()
+            observation = capture_robot_data(
+                robot, prompt=args.prompt, observation_dict=latest.read(), verbose=args.verbose
+            )
+            response = send_to_pi0(client, observation, jpeg_quality=args.jpeg_quality, verbose=args.verbose)
+            return observation, response, time.monotonic() - request_start
         
         print(f"Starting continuous control mode at {args.hz}Hz. Press Ctrl+C to exit.")
         
+        # Start each cycle on an absolute deadline so slow iterations do not drift the cadence
+        cycle_time = 1.0 / args.hz  # Time per cycle in seconds
+        deadline = time.monotonic()
+        
+        next_trajectory = inference_pool.submit(infer_next_trajectory)
         while True:
-            trajectory_start = time.time()
+            observation, response, request_latency = next_trajectory.result()
+            if not args.no_display:
+                display_observation(observation)
             
-            # Capture robot data
-            observation = capture_robot_data(robot, display_function=display_camera_feeds, prompt=args.prompt)
+            # Request the next trajectory while the end of the current one executes, twice the last
+            # request latency before its end: Pi0 inference is hidden behind the robot motion, and
+            # the observation is taken as late as possible so it is close to where the robot ends up
+            next_requests = []
+            
+            def request_next_trajectory():
+                next_requests.append(inference_pool.submit(infer_next_trajectory))
+            
+            # Hold the bus lock for each step so the capture thread does not interleave its reads
+            apply_robot_action(
+                robot, response, hz=args.control_hz, verbose=args.verbose, bus_lock=latest.bus_lock,
+                before_end=request_next_trajectory, before_end_time=2 * request_latency,
+            )
             
-            # Send to Pi0 and apply full trajectory
-            response = send_to_pi0(client, observation)
-            apply_robot_action(robot, response, hz=args.control_hz)
+            # The trajectory was not executed (e.g. empty response), request the next one now
+            if not next_requests:
+                request_next_trajectory()
+            next_trajectory = next_requests[0]
             
-            # Calculate time to wait before next trajectory (to maintain desired frequency)
-            elapsed = time.time() - trajectory_start
-            cycle_time = 1.0 / args.hz  # Time per cycle in seconds
-            sleep_time = max(0, cycle_time - elapsed)
+            # Wait until the next cycle's deadline (to maintain desired frequency)
+            deadline += cycle_time
+            sleep_time = deadline - time.monotonic()
             
             if sleep_time > 0:
                 print(f"Waiting {sleep_time:.2f}s before next trajectory...")
                 time.sleep(sleep_time)
+            else:
+                # Fell behind by more than a cycle, resync instead of rushing to catch up
+                deadline = time.monotonic()
             
     except KeyboardInterrupt:
         print("Continuous control mode interrupted by user")
     finally:
+        # Stop inference and background capture, the robot stays connected for the caller
+        inference_pool.shutdown(wait=True, cancel_futures=True)
+        if latest is not None:
+            latest.stop()
+        
         # Close any open windows
         cleanup_display()
-        
-        # Ensure robot is disconnected properly
-        if robot and robot.is_connected:
-            print("Disconnecting from SO100 robot...")
-            robot.disconnect()
-            print("Robot disconnected")
 
 
 # Camera test mode to display all available cameras with IDs
-def camera_test_mode(args):
+def camera_test_mode(args, robot):
     """Display all available cameras with their names and IDs."""
-
-    robot = None
     try:
-        # Initialize robot
-        robot = initialize_robot()
         print("Accessing all available cameras...")
         
+        # Captions with camera name and ID never change, format them once
+        font = cv2.FONT_HERSHEY_SIMPLEX
+        captions = {cam_name: f"Camera: {cam_name} (ID: {i})" for i, cam_name in enumerate(robot.cameras)}
+        
+        # Per-camera conversion to BGR, decided from the first frame of each camera
+        bgr_converters = {}
+        
         # Keep displaying camera feeds until user quits
         while True:
             # Capture observation to get camera images
             observation_dict = robot.capture_observation()
             
-            # Get all camera images
-            images = {}
-            camera_ids = {}
-            
-            # Get camera ID mapping
-            for i, cam_name in enumerate(robot.cameras):
-                camera_ids[cam_name] = i
-                cam_key = f"observation.images.{cam_name}"
-                if cam_key in observation_dict:
-                    images[cam_name] = observation_dict[cam_key].numpy()
+            # Get all camera images, copied into reusable buffers since captions are drawn on them
+            images = get_camera_images(robot, observation_dict, copy=True)
             
             if not images:
                 print("No camera feeds available")
@@ -192,47 +223,29 @@ def camera_test_mode(args):
                 
             # Process and display each camera feed
             displays = []
-            for cam_name, cam_id in camera_ids.items():
+            for cam_name, caption in captions.items():
                 if cam_name in images and images[cam_name] is not None:
-                    # Ensure image is in correct format
-                    img = images[cam_name]
-                    if img.ndim == 2:  # Convert grayscale to RGB if needed
-                        img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+                    # Ensure image is in correct format (grayscale is converted to BGR)
+                    if cam_name not in bgr_converters:
+                        bgr_converters[cam_name] = make_bgr_converter(images[cam_name])
+                    img = bgr_converters[cam_name](images[cam_name])
                     
                     # Add caption with name and ID
-                    font = cv2.FONT_HERSHEY_SIMPLEX
-                    caption = f"Camera: {cam_name} (ID: {cam_id})"
                     cv2.putText(img, caption, (10, 30), font, 0.7, (0, 255, 0), 2)
                     
                     # Add to list of displays
                     displays.append(img)
             
             if displays:
-                # Arrange images in a grid
-                if len(displays) == 1:
-                    combined = displays[0]
-                elif len(displays) == 2:
-                    combined = np.hstack(displays)
-                else:
-                    # Create a more complex grid for multiple cameras
-                    rows = []
-                    row = []
-                    for i, img in enumerate(displays):
-                        row.append(img)
-                        if (i + 1) % 2 == 0 or i == len(displays) - 1:
-                            # Create a row with uniform size images
-                            for j in range(len(row)):
-                                if row[j].shape != row[0].shape:
-                                    row[j] = cv2.resize(row[j], (row[0].shape[1], row[0].shape[0]))
-                            rows.append(np.hstack(row))
-                            row = []
-                    combined = np.vstack(rows)
+                # Arrange images in a grid, two per row, reusing the same canvas every frame
+                combined = compose_camera_grid(displays)
                 
                 # Show the combined image
+                create_display_window("All Camera Feeds")
                 cv2.imshow("All Camera Feeds", combined)
                 
-                # Wait for key press, exit if 'q' is pressed
-                key = cv2.waitKey(1000)
+                # Pump the window events without stalling the capture, exit if 'q' is pressed
+                key = cv2.waitKey(1)
                 if key == ord('q'):
                     break
             else:
@@ -242,26 +255,29 @@ def camera_test_mode(args):
     finally:
         # Clean up
         cleanup_display()
-        
-        # Ensure robot is disconnected properly
-        if robot and robot.is_connected:
-            print("Disconnecting from SO100 robot...")
-            robot.disconnect()
-            print("Robot disconnected")
 
 
 if __name__ == "__main__":
     # Parse command-line arguments
     args = parse_args()
     
+    # Motor control reports through logging, its per-step details are at debug level
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    logging.getLogger("motor_control").setLevel(logging.DEBUG if args.verbose else logging.INFO)
+    
     print(f"Running in {args.mode} mode with prompt: '{args.prompt}'")
     
+    # Connect to the Pi0 model and the robot once and share them with the selected mode.
+    # The robot is disconnected at exit (see `disconnect_robot` in robot_interface.py).
+    client = None if args.mode == 'camera' else create_pi0_client(host=args.host, port=args.port)
+    robot = initialize_robot()
+    
     # Run the appropriate mode based on the command-line argument
     if args.mode == 'trajectory':
-        trajectory_mode(args)
+        trajectory_mode(args, robot, client)
     elif args.mode == 'continuous':
-        continuous_control_mode(args)
+        continuous_control_mode(args, robot, client)
     elif args.mode == 'camera':
-        camera_test_mode(args)
+        camera_test_mode(args, robot)
     elif args.mode == 'single':
-        single_trajectory_mode(args)
+        single_trajectory_mode(args, robot, client)
@@ -1,53 +1,65 @@
-import numpy as np
+import logging
 import time
 
-# Define denormalization parameters for action outputs - must match normalization in robot_interface.py
-# Assuming the first 5 values correspond to joint positions
-JOINT_ACTION_RANGES = {
-    "min": np.array([-1.0, -1.0, -200.0, -200.0, -10.0]),
-    "max": np.array([1.0, 200.0, 10.0, 10.0, 10.0])
-}
+import numpy as np
+from normalization import affine
+from ranges import GRIPPER_RANGES, JOINT_RANGES
+
+logger = logging.getLogger(__name__)
+
+# With verbose output, log the details of one step out of this many
+VERBOSE_STEP_INTERVAL = 20
+
+# Last part of each control step, in seconds, spent spinning on the clock instead of sleeping,
+# since the OS can wake a sleeping thread up to ~100us late
+SPIN_TIME = 200e-6
+
+# Denormalization parameters for action outputs, the same ranges as the normalization in robot_interface.py
+# Assuming the first 5 values correspond to joint positions and the 7th value (index 6) is the gripper control
+JOINT_ACTION_RANGES = JOINT_RANGES
+GRIPPER_ACTION_RANGES = GRIPPER_RANGES
+
+# First follower arm of each robot, keyed by id(robot): the arms never change once the robot is configured
+_primary_arms = {}
+
+# Denormalization as a single affine transform x * scale + bias, precomputed once in float32
+_JOINT_SCALE = (0.5 * (JOINT_ACTION_RANGES["max"] - JOINT_ACTION_RANGES["min"])).astype(np.float32)
+_JOINT_BIAS = (0.5 * (JOINT_ACTION_RANGES["max"] + JOINT_ACTION_RANGES["min"])).astype(np.float32)
+_GRIPPER_SCALE = float(0.5 * (GRIPPER_ACTION_RANGES["max"][0] - GRIPPER_ACTION_RANGES["min"][0]))
+_GRIPPER_BIAS = float(0.5 * (GRIPPER_ACTION_RANGES["max"][0] + GRIPPER_ACTION_RANGES["min"][0]))
 
-# Assuming the 7th value (index 6) is the gripper control
-GRIPPER_ACTION_RANGES = {
-    "min": np.array([0.0]),
-    "max": np.array([50.0])
-}
+# Motor names of each follower arm, keyed by id(arm)
+_motor_names_cache = {}
+
+# Reusable goal position buffer of each follower arm, keyed by id(arm)
+_positions_buffers = {}
 
 
 def denormalize_joint_actions(normalized_actions):
     """Denormalize joint actions from [-1, 1] to robot's range."""
-    min_vals = JOINT_ACTION_RANGES["min"]
-    max_vals = JOINT_ACTION_RANGES["max"]
-    
     # Convert from [-1, 1] to actual range
-    denormalized = 0.5 * (normalized_actions + 1.0) * (max_vals - min_vals) + min_vals
-    
-    return denormalized
+    return affine(np.asarray(normalized_actions, dtype=np.float32), _JOINT_SCALE, _JOINT_BIAS)
 
 
 def denormalize_gripper_action(normalized_action):
     """Denormalize gripper action from [-1, 1] to robot's range."""
-    min_val = GRIPPER_ACTION_RANGES["min"][0]
-    max_val = GRIPPER_ACTION_RANGES["max"][0]
-    
     # Convert from [-1, 1] to actual range
-    denormalized = 0.5 * (normalized_action + 1.0) * (max_val - min_val) + min_val
-    
-    return denormalized
+    return normalized_action * _GRIPPER_SCALE + _GRIPPER_BIAS
 
 
-def map_pi0_to_so100_actions(pi0_action):
+def map_pi0_to_so100_actions(pi0_action, verbose=False):
     """Map Pi0 actions to SO100 robot joint space.
     
     Args:
         pi0_action: Raw action from Pi0 model
+        verbose: Log the raw and denormalized values at debug level
         
     Returns:
         numpy.ndarray: 6-dimensional action vector for SO100 robot
     """
     # Print the raw normalized action from Pi0
-    print(f"Raw normalized action from Pi0: {pi0_action}")
+    if verbose:
+        logger.debug("Raw normalized action from Pi0: %s", pi0_action)
     
     # Extract the normalized joint actions (first 5 dimensions)
     normalized_arm_joints = pi0_action[:5]
@@ -60,8 +72,9 @@ def map_pi0_to_so100_actions(pi0_action):
     denormalized_gripper = denormalize_gripper_action(normalized_gripper)
     
     # Print the denormalized values
-    print(f"Denormalized arm joints: {denormalized_arm_joints}")
-    print(f"Denormalized gripper: {denormalized_gripper}")
+    if verbose:
+        logger.debug("Denormalized arm joints: %s", denormalized_arm_joints)
+        logger.debug("Denormalized gripper: %s", denormalized_gripper)
     
     # Combine into a 6-dimensional vector
     mapped_action = np.zeros(6)
@@ -71,115 +84,312 @@ def map_pi0_to_so100_actions(pi0_action):
     return mapped_action
 
 
-def apply_single_action(robot, action_step, num_motors=None):
+def map_pi0_trajectory_to_so100(actions_array, num_motors=6):
+    """Map a whole Pi0 trajectory to SO100 joint space in one vectorized pass.
+    
+    Args:
+        actions_array: Array of shape (num_steps, action_dim) with raw Pi0 actions
+        num_motors: Number of follower motors to keep per step
+        
+    Returns:
+        numpy.ndarray: Contiguous float32 array of shape (num_steps, num_motors)
+    """
+    actions = np.asarray(actions_array)
+    gripper_index = 6 if actions.shape[1] > 6 else 5
+    
+    # Denormalize straight into the output columns, without temporary arrays
+    mapped = np.empty((len(actions), 6), dtype=np.float32)
+    joints = mapped[:, :5]
+    np.multiply(actions[:, :5], _JOINT_SCALE, out=joints)
+    joints += _JOINT_BIAS
+    gripper = mapped[:, 5]
+    np.multiply(actions[:, gripper_index], _GRIPPER_SCALE, out=gripper)
+    gripper += _GRIPPER_BIAS
+    
+    if num_motors < 6:
+        return np.ascontiguousarray(mapped[:, :num_motors])
+    return mapped
+
+
+def _primary_arm(robot):
+    """Return the first follower arm of the robot and its motor names, resolved once per robot."""
+    primary = _primary_arms.get(id(robot))
+    if primary is None:
+        arm = next(iter(robot.follower_arms.values()), None)
+        if arm is None:
+            return None, ()
+        motor_names = _motor_names_cache.get(id(arm))
+        if motor_names is None:
+            motor_names = tuple(arm.motors.keys())
+            _motor_names_cache[id(arm)] = motor_names
+        primary = (arm, motor_names)
+        _primary_arms[id(robot)] = primary
+    return primary
+
+
+def apply_single_action(robot, action_step, num_motors=None, verbose=False):
     """Apply a single action step to the robot.
     
     Args:
         robot: The robot instance
         action_step: A single action step (array of motor positions)
         num_motors: Optional number of motors (detected if None)
+        verbose: Log the raw and mapped action values at debug level
     
     Returns:
         bool: True if successful, False otherwise
     """
-    # Get the number of motors if not provided
+    arm, motor_names = _primary_arm(robot)
+    
     if num_motors is None:
-        for name in robot.follower_arms:
-            num_motors = len(robot.follower_arms[name].motors)
-            break  # Just check the first arm
+        num_motors = len(motor_names)
     
-    if num_motors == 0:
-        print("No motors found in follower arm")
+    if arm is None or num_motors == 0:
+        logger.error("No motors found in follower arm")
         return False
     
+    if num_motors < len(motor_names):
+        motor_names = motor_names[:num_motors]
+    
+    # Reuse the arm's goal position buffer instead of allocating one per step
+    positions_buffer = _positions_buffers.get(id(arm))
+    if positions_buffer is None:
+        positions_buffer = np.empty(len(arm.motors), dtype=np.float32)
+        _positions_buffers[id(arm)] = positions_buffer
+    positions_array = positions_buffer[:num_motors]
+    
     # Use the improved mapping function instead of simple truncation
-    print(f"Raw action values: {action_step}")
-    positions_array = map_pi0_to_so100_actions(action_step)
-    print(f"Mapped to SO100: {positions_array}")
-    
-    # Send to each follower arm
-    for name in robot.follower_arms:
-        try:
-            # Write positions for each motor individually
-            for motor_name, motor_value in zip(robot.follower_arms[name].motors.keys(), positions_array):
-                robot.follower_arms[name].write("Goal_Position", motor_value, motor_name)
-            return True
-        except Exception as e:
-            print(f"Error setting motor positions: {e}")
-            return False
-
-
-def apply_trajectory(robot, actions_array, hz=20):
+    if verbose:
+        logger.debug("Raw action values: %s", action_step)
+    np.copyto(positions_array, map_pi0_to_so100_actions(action_step, verbose=verbose)[:num_motors])
+    if verbose:
+        logger.debug("Mapped to SO100: %s", positions_array)
+    
+    return _write_goal_positions(arm, positions_array, motor_names)
+
+
+def _write_goal_positions(arm, positions_array, motor_names):
+    """Write the goal positions of `motor_names` in a single sync write, motor by motor if that fails."""
+    try:
+        # Write all goal positions at once so the bus issues a single sync write
+        arm.write("Goal_Position", positions_array, motor_names)
+        return True
+    except Exception as e:
+        logger.warning("Error setting motor positions with a sync write: %s, retrying motor by motor", e)
+    
+    try:
+        for i, motor_name in enumerate(motor_names):
+            arm.write("Goal_Position", positions_array[i:i + 1], motor_name)
+        return True
+    except Exception as e:
+        logger.error("Error setting motor positions: %s", e)
+        return False
+
+
+def _goal_step_conversion(arm, motor_names):
+    """Return the conversion from calibrated goal positions to raw motor steps.
+    
+    This is the vectorized form of the bus `revert_calibration`: `steps = round(positions * scale + offset)`.
+    It is not cached, the homing offsets of the calibration shift by whole turns when the bus
+    autocorrects it (on position reads) or when it is set again.
+    
+    Args:
+        arm: Follower arm motors bus
+        motor_names: Names of the converted motors
+    
+    Returns:
+        tuple: (scale, offset, motor_models, motor_ids), or None if the arm is not calibrated
+            or does not support raw writes
+    """
+    conversion = None
+    calibration = getattr(arm, "calibration", None)
+    if calibration is not None and hasattr(arm, "write_with_motor_ids"):
+        scale = np.empty(len(motor_names))
+        offset = np.empty(len(motor_names))
+        motor_models = []
+        motor_ids = []
+        for i, name in enumerate(motor_names):
+            motor_id, model = arm.motors[name]
+            motor_ids.append(motor_id)
+            motor_models.append(model)
+            
+            calib_idx = calibration["motor_names"].index(name)
+            calib_mode = calibration["calib_mode"][calib_idx]
+            if calib_mode == "DEGREE":
+                # Degrees to 0-centered steps, minus the homing offset, in the motor rotation direction
+                sign = -1.0 if calibration["drive_mode"][calib_idx] else 1.0
+                scale[i] = sign * (arm.model_resolution[model] // 2) / 180
+                offset[i] = -sign * calibration["homing_offset"][calib_idx]
+            elif calib_mode == "LINEAR":
+                # Percentage of the range between the start and end positions
+                start_pos = calibration["start_pos"][calib_idx]
+                end_pos = calibration["end_pos"][calib_idx]
+                scale[i] = (end_pos - start_pos) / 100
+                offset[i] = start_pos
+            else:
+                break
+        else:
+            conversion = (scale, offset, motor_models, motor_ids)
+    
+    return conversion
+
+
+def _write_goal_steps(arm, motor_models, motor_ids, steps):
+    """Write raw goal steps, already converted from the calibrated positions, in a single sync write,
+    motor by motor if that fails."""
+    try:
+        arm.write_with_motor_ids(motor_models, motor_ids, "Goal_Position", steps)
+        return True
+    except Exception as e:
+        logger.warning("Error setting motor positions with a sync write: %s, retrying motor by motor", e)
+
+    try:
+        for model, motor_id, step in zip(motor_models, motor_ids, steps, strict=True):
+            arm.write_with_motor_ids([model], motor_id, "Goal_Position", step)
+        return True
+    except Exception as e:
+        logger.error("Error setting motor positions: %s", e)
+        return False
+
+
+def apply_trajectory(robot, actions_array, hz=20, verbose=False, bus_lock=None, before_end=None, before_end_time=0.0):
     """Execute a full trajectory at a fixed control frequency.
     
     Args:
         robot: The robot instance
         actions_array: Array of action steps from Pi0
         hz: Control frequency in Hz (default: 20)
+        verbose: Also log the details of every `VERBOSE_STEP_INTERVAL`-th step,
+            on top of the end-of-trajectory summary
+        bus_lock: Optional lock held while writing each step, when another thread reads from the same bus
+        before_end: Optional callback called once from the control loop, as soon as at most
+            `before_end_time` seconds of the trajectory remain (e.g. to request the next trajectory).
+            It is called when the trajectory stops early too, but not if it is not executed at all.
+        before_end_time: Time in seconds before the end of the trajectory to call `before_end`
     """
-    if len(actions_array) == 0:
-        print("Empty actions array received")
+    num_steps = len(actions_array)
+    if num_steps == 0:
+        logger.error("Empty actions array received")
         return
     
-    print(f"Executing trajectory with {len(actions_array)} steps at {hz}Hz")
+    logger.info("Executing trajectory with %d steps at %sHz", num_steps, hz)
     
-    # Get the number of motors in the follower arm
-    num_motors = 0
-    for name in robot.follower_arms:
-        num_motors = len(robot.follower_arms[name].motors)
-        print(f"Follower arm '{name}' has {num_motors} motors")
-        break  # Just check the first arm
+    # Resolve the follower arm and its motors once for the whole trajectory
+    arm, motor_names = _primary_arm(robot)
+    num_motors = len(motor_names)
+    if arm is None or num_motors == 0:
+        logger.error("No motors found in follower arm")
+        return
+    if verbose:
+        logger.debug("Follower arm has %d motors", num_motors)
     
-    # Calculate time per step in seconds
-    step_duration = 1.0 / hz
+    # Map the whole trajectory once so each step writes a contiguous float32 row as is
+    actions = map_pi0_trajectory_to_so100(actions_array, num_motors)
+    if verbose:
+        logger.debug("Raw first action values: %s", actions_array[0])
     
-    # Execute each action step in sequence at the specified frequency
-    for i, action_step in enumerate(actions_array):
-        step_start_time = time.time()
+    # When possible, also convert it to raw motor steps in one pass, so the bus does not
+    # revert the calibration motor by motor on every step. The conversion is computed from the
+    # current calibration for each trajectory
+    conversion = _goal_step_conversion(arm, motor_names)
+    if conversion is None:
+        def write_step(i):
+            return _write_goal_positions(arm, actions[i], motor_names)
+    else:
+        scale, offset, motor_models, motor_ids = conversion
+        steps = np.rint(actions * scale + offset).astype(np.int32).tolist()
         
-        print(f"Executing step {i+1}/{len(actions_array)}")
-        
-        # Apply this action step
-        success = apply_single_action(robot, action_step, num_motors)
+        def write_step(i):
+            return _write_goal_steps(arm, motor_models, motor_ids, steps[i])
+    
+    # Schedule every step against an absolute deadline on the high resolution monotonic clock,
+    # so per-step jitter does not accumulate into drift over the trajectory
+    # (as Python floats, cheaper to compare with the clock than numpy scalars)
+    start_time = time.perf_counter()
+    deadlines = (start_time + np.arange(1, num_steps + 1) / hz).tolist()
+    before_end_at = deadlines[-1] - before_end_time
+    
+    # End time of each executed step, the step rates are computed from them after the trajectory
+    step_end_times = [start_time]
+    
+    # Execute each action step in sequence at the specified frequency
+    for i in range(num_steps):
+        verbose_step = verbose and i % VERBOSE_STEP_INTERVAL == 0
+        if verbose_step:
+            logger.debug("Executing step %d/%d", i + 1, num_steps)
         
-        # Calculate how long to wait to maintain desired frequency
-        elapsed = time.time() - step_start_time
-        sleep_time = max(0, step_duration - elapsed)
+        # Apply this action step, already mapped to the SO100 goal positions
+        if verbose_step:
+            logger.debug("Mapped to SO100: %s", actions[i])
+        if bus_lock is None:
+            success = write_step(i)
+        else:
+            with bus_lock:
+                success = write_step(i)
         
+        # Wait until this step's deadline to maintain desired frequency: sleep, then spin for the
+        # last `SPIN_TIME` so the step ends on time despite the sleep wake-up jitter
+        deadline = deadlines[i]
+        sleep_time = deadline - time.perf_counter() - SPIN_TIME
         if sleep_time > 0:
             time.sleep(sleep_time)
-            actual_hz = 1.0 / (elapsed + sleep_time)
-        else:
-            actual_hz = 1.0 / elapsed if elapsed > 0 else float('inf')
+        while time.perf_counter() < deadline:
+            pass
+        
+        step_end_time = time.perf_counter()
+        step_end_times.append(step_end_time)
         
-        print(f"Step executed at {actual_hz:.1f}Hz (target: {hz}Hz)")
+        if before_end is not None and step_end_time >= before_end_at:
+            before_end()
+            before_end = None
+        
+        if verbose_step:
+            step_hz = 1.0 / (step_end_time - step_end_times[-2])
+            logger.debug("Step %d/%d executed at %.1fHz (target: %sHz)", i + 1, num_steps, step_hz, hz)
         
         # Check if we should continue
         if not success:
-            print("Stopping trajectory execution due to error")
+            logger.error("Stopping trajectory execution due to error")
             break
+    
+    if before_end is not None:
+        before_end()
+    
+    num_executed = len(step_end_times) - 1
+    step_hz = 1.0 / np.diff(step_end_times)
+    logger.info(
+        "Executed %d/%d steps: mean %.1fHz, min %.1fHz, max %.1fHz (target: %sHz)",
+        num_executed, num_steps, step_hz.mean(), step_hz.min(), step_hz.max(), hz,
+    )
 
 
-def apply_robot_action(robot, action, hz=20):
+def apply_robot_action(robot, action, hz=20, verbose=False, bus_lock=None, before_end=None, before_end_time=0.0):
     """Apply the action received from Pi0 to the follower arm.
     
     Args:
         robot: The robot instance
         action: Response from Pi0 model containing actions
         hz: Control frequency in Hz (default: 20)
+        verbose: Log per-step details while executing the trajectory
+        bus_lock: Optional lock held while writing each step, see `apply_trajectory`
+        before_end: Optional callback called shortly before the end of the trajectory, see `apply_trajectory`
+        before_end_time: Time in seconds before the end of the trajectory to call `before_end`
     """
     if 'actions' not in action:
-        print("No actions found in Pi0 response")
+        logger.error("No actions found in Pi0 response")
         return
     
     actions_array = action['actions']
     
     if len(actions_array) == 0:
-        print("Empty actions array received")
+        logger.error("Empty actions array received")
         return
     
-    print(f"Received {len(actions_array)} action steps from Pi0 model")
-    print(f"Action shape: {actions_array.shape}")
+    logger.info("Received %d action steps from Pi0 model", len(actions_array))
+    logger.info("Action shape: %s", actions_array.shape)
     
     # Execute the full trajectory at the specified control frequency
-    apply_trajectory(robot, actions_array, hz=hz) 
\ No newline at end of file
+    apply_trajectory(
+        robot, actions_array, hz=hz, verbose=verbose, bus_lock=bus_lock,
+        before_end=before_end, before_end_time=before_end_time,
+    ) 
\ No newline at end of file
@@ -0,0 +1,34 @@
+import numpy as np
+
+# Compiled kernels for the normalization of robot states and the denormalization of Pi0 actions.
+# They are loaded from the `normalization_aot` extension when it was built ahead of time with
+# `python build_kernels.py`, which removes any JIT compilation from the start of the program.
+# Otherwise they are JIT compiled with explicit signatures, so they are compiled when this module
+# is imported (or loaded from the on-disk cache) and never on the first call inside the control loop.
+
+AFFINE_SIGNATURE = "float32[:](float32[:], float32[:], float32[:])"
+CLIP_AFFINE_SIGNATURE = "void(float32[:], float32[:], float32[:], float32[:], float32[:], float32[:])"
+
+
+def affine_kernel(values, scale, bias):
+    """Return `values * scale + bias` element-wise, in a single loop without temporaries."""
+    out = np.empty(values.shape[0], dtype=np.float32)
+    for i in range(values.shape[0]):
+        out[i] = values[i] * scale[i] + bias[i]
+    return out
+
+
+def clip_affine_kernel(values, min_vals, max_vals, scale, bias, out):
+    """Write `clip(values, min_vals, max_vals) * scale + bias` element-wise into `out`, in a single loop."""
+    for i in range(values.shape[0]):
+        value = min(max(values[i], min_vals[i]), max_vals[i])
+        out[i] = value * scale[i] + bias[i]
+
+
+try:
+    from normalization_aot import affine, clip_affine
+except ImportError:
+    from numba import njit
+    
+    affine = njit(AFFINE_SIGNATURE, cache=True, fastmath=True)(affine_kernel)
+    clip_affine = njit(CLIP_AFFINE_SIGNATURE, cache=True, fastmath=True)(clip_affine_kernel)
@@ -1,9 +1,29 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
 from openpi_client import websocket_client_policy
 
+# Camera images of the observation, see `capture_robot_data` in robot_interface.py
+IMAGE_KEYS = ("observation/exterior_image_1_left", "observation/wrist_image_left")
+
+# JPEG quality of the sent camera images when none is given, about 10x smaller than raw frames
+DEFAULT_JPEG_QUALITY = 85
+
+# Clients shared across calls, keyed by (host, port)
+_clients = {}
+
+# Worker sending the asynchronous requests, a single one so requests reach the server in submission order
+_request_pool = None
+
+# Workers encoding the camera images in parallel, OpenCV releases the GIL while encoding
+_encode_pool = ThreadPoolExecutor(max_workers=len(IMAGE_KEYS), thread_name_prefix="pi0-encode")
+
 
 def create_pi0_client(host="localhost", port=9000):
     """Create a client connection to the Pi0 model server.
     
+    The connection is made once per server: later calls with the same host and port return the same client.
+    
     Args:
         host: Hostname of the Pi0 server
         port: Port number of the Pi0 server
@@ -11,22 +31,89 @@ def create_pi0_client(host="localhost", port=9000):
     Returns:
         WebsocketClientPolicy: Connected client instance
     """
-    print(f"Connecting to Pi0 model at {host}:{port}...")
-    client = websocket_client_policy.WebsocketClientPolicy(host=host, port=port)
-    return client
+    key = (host, port)
+    if key not in _clients:
+        print(f"Connecting to Pi0 model at {host}:{port}...")
+        _clients[key] = websocket_client_policy.WebsocketClientPolicy(host=host, port=port)
+    return _clients[key]
+
+
+def encode_image(image, quality=DEFAULT_JPEG_QUALITY):
+    """Encode an RGB image to JPEG bytes.
+    
+    Args:
+        image: RGB image as a uint8 numpy array
+        quality: JPEG quality (0-100)
+        
+    Returns:
+        bytes: The JPEG encoded image
+    """
+    ok, encoded = cv2.imencode(".jpg", cv2.cvtColor(image, cv2.COLOR_RGB2BGR), [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise ValueError("Failed to encode image to JPEG")
+    return encoded.tobytes()
+
+
+def encode_observation_images(observation, quality=DEFAULT_JPEG_QUALITY):
+    """Replace the camera images of an observation by their JPEG bytes.
+    
+    Args:
+        observation: Observation dictionary, left unchanged
+        quality: JPEG quality (0-100)
+        
+    Returns:
+        dict: Copy of the observation with JPEG encoded images
+    """
+    keys = [key for key in IMAGE_KEYS if key in observation]
+    encoded = _encode_pool.map(lambda key: encode_image(observation[key], quality), keys)
+    return {**observation, **dict(zip(keys, encoded, strict=True))}
 
 
-def send_to_pi0(client, observation):
+def send_to_pi0(client, observation, jpeg_quality=None, verbose=False):
     """Send observation to Pi0 model and get response.
     
+    The client already sends the numpy arrays as binary msgpack frames, so the request payload
+    is only reduced further by `jpeg_quality`.
+    
     Args:
         client: Pi0 client instance
         observation: Observation dictionary
+        jpeg_quality: If set, send the camera images as JPEG bytes of this quality instead of raw
+            arrays, which cuts the request size by an order of magnitude. The server must decode them.
+        verbose: Print the full response instead of the shape of its arrays
         
     Returns:
         dict: Response from Pi0 model including actions
     """
+    if jpeg_quality is not None:
+        observation = encode_observation_images(observation, jpeg_quality)
+    
     print("Sending observation to Pi0 model...")
     response = client.infer(observation)
-    print("Pi0 model response:", response)
-    return response 
\ No newline at end of file
+    if verbose:
+        print("Pi0 model response:", response)
+    else:
+        # Formatting whole action chunks takes longer than the rest of the request handling
+        print("Pi0 model response:", {key: getattr(value, "shape", value) for key, value in response.items()})
+    return response
+
+
+def send_to_pi0_async(client, observation, jpeg_quality=None, verbose=False):
+    """Send observation to Pi0 model without waiting for the response.
+    
+    Serialization and inference run in a background thread, so the caller can display
+    the camera feeds or execute the current trajectory in the meantime.
+    
+    Args:
+        client: Pi0 client instance
+        observation: Observation dictionary, must not be modified until the response arrives
+        jpeg_quality: Optional JPEG quality of the sent camera images, see `send_to_pi0`
+        verbose: Print the full response, see `send_to_pi0`
+        
+    Returns:
+        concurrent.futures.Future: Resolves to the response from Pi0 model (see `send_to_pi0`)
+    """
+    global _request_pool
+    if _request_pool is None:
+        _request_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pi0-request")
+    return _request_pool.submit(send_to_pi0, client, observation, jpeg_quality, verbose) 
\ No newline at end of file
@@ -0,0 +1,16 @@
+import numpy as np
+
+# Ranges of the SO100 joints and gripper, shared by the normalization of the robot state
+# (robot_interface.py) and the denormalization of the Pi0 actions (motor_control.py),
+# so the two always map [-1, 1] to the same robot values.
+
+# The first 5 values correspond to joint positions
+JOINT_RANGES = {
+    "min": np.array([-1.0, -1.0, -200.0, -200.0, -10.0]),
+    "max": np.array([1.0, 200.0, 10.0, 10.0, 10.0])
+}
+
+GRIPPER_RANGES = {
+    "min": np.array([0.0]),
+    "max": np.array([50.0])
+}
@@ -1,53 +1,91 @@
+import atexit
+import contextlib
+import cv2
 import numpy as np
+import queue
+import threading
 import time
 import torch
+from concurrent.futures import ThreadPoolExecutor
 from lerobot.common.robot_devices.robots.configs import So100RobotConfig
 from lerobot.common.robot_devices.robots.utils import make_robot_from_config
-from PIL import Image
 
+from camera_utils import configure_low_latency
+from normalization import clip_affine
+from ranges import GRIPPER_RANGES, JOINT_RANGES
 
-# Define normalization parameters - must match denormalization in motor_control.py
-JOINT_POSITION_RANGES = {
-    "min": np.array([-1.0, -1.0, -200.0, -200.0, -10.0]),
-    "max": np.array([1.0, 200.0, 10.0, 10.0, 10.0])
-}
 
-GRIPPER_POSITION_RANGES = {
-    "min": np.array([0.0]),
-    "max": np.array([50.0])
-}
+# Normalization parameters, the same ranges as the denormalization in motor_control.py
+JOINT_POSITION_RANGES = JOINT_RANGES
+GRIPPER_POSITION_RANGES = GRIPPER_RANGES
 
+# Normalization as clip then a single affine transform x * scale + bias, precomputed once in float32
+_JOINT_MIN = JOINT_POSITION_RANGES["min"].astype(np.float32)
+_JOINT_MAX = JOINT_POSITION_RANGES["max"].astype(np.float32)
+_JOINT_SCALE = (2.0 / (JOINT_POSITION_RANGES["max"] - JOINT_POSITION_RANGES["min"])).astype(np.float32)
+_JOINT_BIAS = (-1.0 - JOINT_POSITION_RANGES["min"] * _JOINT_SCALE).astype(np.float32)
+_GRIPPER_MIN = float(GRIPPER_POSITION_RANGES["min"][0])
+_GRIPPER_MAX = float(GRIPPER_POSITION_RANGES["max"][0])
+_GRIPPER_SCALE = 2.0 / (_GRIPPER_MAX - _GRIPPER_MIN)
+_GRIPPER_BIAS = -1.0 - _GRIPPER_MIN * _GRIPPER_SCALE
 
-def normalize_joint_position(joint_position):
-    """Normalize joint positions to the range [-1, 1]."""
-    min_vals = JOINT_POSITION_RANGES["min"]
-    max_vals = JOINT_POSITION_RANGES["max"]
+# Cameras fed to the Pi0 model: laptop for the wrist view and phone for the exterior view
+PI0_CAMERAS = frozenset({"laptop", "phone"})
+
+# Connected robot shared by every caller of `initialize_robot`
+_robot = None
+
+# Per-camera host buffers reused across frames by `get_camera_images(..., copy=True)`, keyed by camera name
+_cam_buffers = {}
+
+# Arrays of the Pi0 observation reused by every `capture_robot_data` call, keyed by observation field
+_obs_buffers = {}
+
+# Workers processing the Pi0 camera images in parallel, OpenCV releases the GIL while resizing
+_image_pool = ThreadPoolExecutor(max_workers=len(PI0_CAMERAS), thread_name_prefix="process-images")
+
+
+def normalize_joint_position(joint_position, out=None):
+    """Normalize joint positions to the range [-1, 1].
     
-    # Clip values to the defined ranges
-    clipped = np.clip(joint_position, min_vals, max_vals)
+    Args:
+        joint_position: Joint positions in the robot's range
+        out: Optional float32 array to write the normalized positions into instead of allocating one
     
-    # Apply min-max normalization to [-1, 1]
-    normalized = 2.0 * (clipped - min_vals) / (max_vals - min_vals) - 1.0
+    Returns:
+        numpy.ndarray: The normalized joint positions (`out` if given)
+    """
+    joint_position = np.asarray(joint_position, dtype=np.float32)
+    if out is None:
+        out = np.empty(joint_position.shape, dtype=np.float32)
     
-    return normalized
+    # Clip values to the defined ranges and apply min-max normalization to [-1, 1], in one fused pass
+    clip_affine(joint_position, _JOINT_MIN, _JOINT_MAX, _JOINT_SCALE, _JOINT_BIAS, out)
+    return out
 
 
 def normalize_gripper_position(gripper_position):
     """Normalize gripper position to the range [-1, 1]."""
-    min_val = GRIPPER_POSITION_RANGES["min"][0]
-    max_val = GRIPPER_POSITION_RANGES["max"][0]
-    
     # Clip value to the defined range
-    clipped = np.clip(gripper_position[0], min_val, max_val)
+    clipped = min(max(float(gripper_position[0]), _GRIPPER_MIN), _GRIPPER_MAX)
     
     # Apply min-max normalization to [-1, 1]
-    normalized = 2.0 * (clipped - min_val) / (max_val - min_val) - 1.0
-    
-    return np.array([normalized])
+    return np.array([clipped * _GRIPPER_SCALE + _GRIPPER_BIAS], dtype=np.float32)
 
 
-def initialize_robot():
-    """Initialize and connect to the SO100 robot."""
+def initialize_robot(low_latency_cameras=True):
+    """Initialize and connect to the SO100 robot.
+    
+    The robot is created once: later calls return the same connected instance.
+    
+    Args:
+        low_latency_cameras: Limit the OpenCV cameras' frame queue to one frame so observations
+            are not delayed by stale buffered frames (default: True)
+    """
+    global _robot
+    if _robot is not None and _robot.is_connected:
+        return _robot
+    
     print("Initializing SO100 robot...")
     robot_config = So100RobotConfig(mock=False)
     robot = make_robot_from_config(robot_config)
@@ -56,67 +94,232 @@ def initialize_robot():
     robot.connect()
     print("Successfully connected to SO100 robot")
     
+    if low_latency_cameras:
+        for cam_name, camera in robot.cameras.items():
+            # Only OpenCV cameras expose a `cv2.VideoCapture`, others are left untouched
+            if not configure_low_latency(getattr(camera, "camera", None)):
+                print(f"Camera '{cam_name}' does not support a single frame buffer")
+    
     # Wait for robot to stabilize
     time.sleep(1)
     
+    _robot = robot
     return robot
 
 
-def process_images(images, camera_name, default_shape=(224, 224, 3)):
-    """Process camera images to the required format."""
-    processed_image = np.zeros(default_shape, dtype=np.uint8)
+def disconnect_robot():
+    """Disconnect the robot created by `initialize_robot`, if still connected."""
+    global _robot
+    if _robot is not None and _robot.is_connected:
+        print("Disconnecting from SO100 robot...")
+        _robot.disconnect()
+        print("Robot disconnected")
+    _robot = None
+
+
+# Release the shared robot when the program exits, whichever mode used it
+atexit.register(disconnect_robot)
+
+
+class LatestObservation:
+    """Capture robot observations in a background thread, keeping only the most recent one.
+    
+    The follower arm state is read over the same serial bus the motor commands are written to,
+    so hold `bus_lock` while writing to the motors to keep the two threads from interleaving packets.
+    Camera frames are already grabbed by one background thread per camera (`camera.async_read()`),
+    so `fps` only bounds how often the state and latest frames are gathered into an observation.
+    
+    Example:
+        latest = LatestObservation(robot)
+        latest.start()
+        observation_dict = latest.read()
+        apply_robot_action(robot, response, bus_lock=latest.bus_lock)
+        latest.stop()
+    """
+    
+    def __init__(self, robot, fps=30):
+        self.robot = robot
+        self.period = 1.0 / fps
+        self.bus_lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+        # Single slot: a new observation replaces the previous one if it was not consumed
+        self._latest = queue.Queue(maxsize=1)
+    
+    def start(self):
+        if self.thread is None:
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self._capture_loop, daemon=True)
+            self.thread.start()
+    
+    def _capture_loop(self):
+        while not self.stop_event.is_set():
+            try:
+                with self.bus_lock:
+                    observation_dict = self.robot.capture_observation()
+            except Exception as e:
+                print(f"Error capturing observation in thread: {e}")
+                time.sleep(0.1)
+                continue
+            
+            # Drop the stale observation, if any, and publish the new one
+            with contextlib.suppress(queue.Empty):
+                self._latest.get_nowait()
+            self._latest.put(observation_dict)
+            
+            self.stop_event.wait(self.period)
+    
+    def read(self, timeout=5.0):
+        """Return an observation captured after this call, discarding any older one.
+
+        Raises TimeoutError if no observation is captured within `timeout` seconds.
+        """
+        with contextlib.suppress(queue.Empty):
+            self._latest.get_nowait()
+        try:
+            return self._latest.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No observation captured in {timeout}s") from None
+    
+    def stop(self):
+        if self.thread is not None:
+            self.stop_event.set()
+            self.thread.join()
+            self.thread = None
+
+
+def get_camera_images(robot, observation_dict, copy=False, cameras=None):
+    """Get the camera images of an observation as numpy arrays.
+    
+    Args:
+        robot: The robot instance
+        observation_dict: Observation returned by `robot.capture_observation()`
+        copy: Copy each frame into a per-camera buffer reused across calls, so it can be modified
+            in place without touching the camera's own frame (default: False, return zero-copy views)
+        cameras: Optional names of the cameras to get, the other cameras are skipped (default: all)
     
-    if camera_name in images and images[camera_name] is not None:
-        img = Image.fromarray(images[camera_name])
-        img = img.resize((default_shape[0], default_shape[1]))
-        processed_image = np.array(img)
+    Returns:
+        dict: Camera name to HWC uint8 image
+    """
+    images = {}
+    for cam_name in robot.cameras:
+        if cameras is not None and cam_name not in cameras:
+            continue
+        cam_key = f"observation.images.{cam_name}"
+        if cam_key not in observation_dict:
+            continue
         
-    return processed_image
+        # CPU tensors share memory with the returned array, so this does not copy the frame
+        frame = observation_dict[cam_key].numpy()
+        if copy:
+            buffer = _cam_buffers.get(cam_name)
+            if buffer is None or buffer.shape != frame.shape or buffer.dtype != frame.dtype:
+                buffer = np.empty_like(frame)
+                _cam_buffers[cam_name] = buffer
+            np.copyto(buffer, frame)
+            frame = buffer
+        images[cam_name] = frame
+    
+    return images
 
 
-def capture_robot_data(robot, display_function=None, prompt="Pick up the duck"):
+def _obs_buffer(key, shape, dtype):
+    """Return the zero-initialized observation buffer of `key`, reallocated only when its shape or dtype change."""
+    buffer = _obs_buffers.get(key)
+    if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+        buffer = np.zeros(shape, dtype=dtype)
+        _obs_buffers[key] = buffer
+    return buffer
+
+
+def process_images(images, camera_name, default_shape=(224, 224, 3), out=None):
+    """Process camera images to the required format.
+    
+    Args:
+        images: Dictionary with camera images, see `get_camera_images`
+        camera_name: Name of the camera to process
+        default_shape: Required image shape
+        out: Optional uint8 buffer of `default_shape` to resize the image into instead of allocating one
+    
+    Returns:
+        numpy.ndarray: The image of `default_shape`, black if the camera is missing
+    """
+    if camera_name not in images or images[camera_name] is None:
+        if out is None:
+            return np.zeros(default_shape, dtype=np.uint8)
+        out.fill(0)
+        return out
+    
+    img = images[camera_name]
+    if img.shape[:2] == default_shape[:2]:
+        # Already at the required size, no need to resize
+        return img
+    
+    # Resize the array directly, area interpolation avoids aliasing when downscaling camera frames
+    return cv2.resize(
+        np.ascontiguousarray(img), (default_shape[1], default_shape[0]), dst=out, interpolation=cv2.INTER_AREA
+    )
+
+
+def capture_robot_data(robot, display_function=None, prompt="Pick up the duck", observation_dict=None,
+                       required_cams=PI0_CAMERAS, verbose=False):
     """Capture and process data from the robot.
     
     Args:
         robot: The robot instance
         display_function: Optional function to display camera feeds
         prompt: Text prompt for the Pi0 model
+        observation_dict: Optional raw observation already captured (e.g. by `LatestObservation`),
+            otherwise a new one is captured from the robot
+        required_cams: Names of the cameras to convert, the frames of the other cameras are skipped
+            (default: `PI0_CAMERAS`, None converts all cameras)
+        verbose: Also print the raw and normalized joint and gripper positions
     
     Returns:
-        observation: The observation dictionary for Pi0
+        observation: The observation dictionary for Pi0. Its arrays are reused buffers, overwritten
+            by the next call, so send or copy the observation before capturing the next one.
     """
     print(f"Capturing robot data with prompt: '{prompt}'")
-    observation_dict = robot.capture_observation()
+    if observation_dict is None:
+        observation_dict = robot.capture_observation()
 
-    print("Our observation dict", observation_dict["observation.state"])
+    if verbose:
+        print("Our observation dict", observation_dict["observation.state"])
     
-    # Extract joint positions (comes as a torch tensor)
-    joint_positions = observation_dict["observation.state"]
+    # Extract joint positions (comes as a CPU torch tensor, converted once without copying)
+    joint_positions = observation_dict["observation.state"].numpy()
     
-    # Separate gripper position (last element) from other joint positions
-    gripper_position = joint_positions[-1:].numpy()
-    joint_position = joint_positions[:-1].numpy()
+    # Separate gripper position (last element) from other joint positions, as views on the state
+    gripper_position = joint_positions[-1:]
+    joint_position = joint_positions[:-1]
     
     # Print raw values before normalization
-    print("Our joint position", joint_position, "\nOur gripper position", gripper_position)
+    if verbose:
+        print("Our joint position", joint_position, "\nOur gripper position", gripper_position)
     
     # Normalize joint and gripper positions
-    normalized_joint_position = normalize_joint_position(joint_position)
+    normalized_joint_position = normalize_joint_position(
+        joint_position, out=_obs_buffer("joint_position", joint_position.shape, np.float32)
+    )
     normalized_gripper_position = normalize_gripper_position(gripper_position)
     
-    print("Normalized joint position", normalized_joint_position, 
-          "\nNormalized gripper position", normalized_gripper_position)
+    if verbose:
+        print("Normalized joint position", normalized_joint_position, 
+              "\nNormalized gripper position", normalized_gripper_position)
     
-    # Get camera images if available
-    images = {}
-    for cam_name in robot.cameras:
-        cam_key = f"observation.images.{cam_name}"
-        if cam_key in observation_dict:
-            images[cam_name] = observation_dict[cam_key].numpy()
+    # Get camera images if available (read-only views, they are only resized below)
+    images = get_camera_images(robot, observation_dict, cameras=required_cams)
     
-    # Process camera images - use laptop for exterior and phone for wrist
-    wrist_image = process_images(images, "laptop")
-    exterior_image = process_images(images, "phone")
+    # Process camera images in parallel - use laptop for exterior and phone for wrist
+    image_shape = (224, 224, 3)
+    wrist_future = _image_pool.submit(
+        process_images, images, "laptop", image_shape, out=_obs_buffer("wrist_image", image_shape, np.uint8)
+    )
+    exterior_future = _image_pool.submit(
+        process_images, images, "phone", image_shape, out=_obs_buffer("exterior_image", image_shape, np.uint8)
+    )
+    wrist_image = wrist_future.result()
+    exterior_image = exterior_future.result()
     
     # Display camera feeds if a display function is provided
     if display_function:
@@ -138,8 +341,9 @@ def capture_robot_data(robot, display_function=None, prompt="Pick up the duck"):
         "observation/wrist_image_left": wrist_image,
         
         # Additional state
-        "observation/joint_velocity": np.zeros_like(normalized_joint_position),
-        "observation/gripper_velocity": np.zeros_like(normalized_gripper_position),
+        # Velocities are not measured, share constant zero buffers
+        "observation/joint_velocity": _obs_buffer("joint_velocity", normalized_joint_position.shape, np.float32),
+        "observation/gripper_velocity": _obs_buffer("gripper_velocity", normalized_gripper_position.shape, np.float32),
         
         # Prompt
         "prompt": prompt
@@ -1,10 +1,21 @@
 #!/usr/bin/env python3
 
 import argparse
+import multiprocessing as mp
+import queue
+import sys
 import time
+from functools import lru_cache
 from lerobot.common.robot_devices.robots.configs import So100RobotConfig
 from lerobot.common.robot_devices.utils import RobotDeviceNotConnectedError, RobotDeviceAlreadyConnectedError
+from lerobot.common.robot_devices.motors.utils import (
+    read_register_block,
+    resolve_register_block,
+    set_low_latency,
+)
 
+# Memoized, the interactive and scanning loops look the classes up for every motor
+@lru_cache(maxsize=2)
 def get_motor_bus_cls(brand: str) -> tuple:
     """Get the appropriate motor bus class and configuration based on the brand."""
     if brand == "feetech":
@@ -28,22 +39,21 @@ def get_motor_bus_cls(brand: str) -> tuple:
             f"Currently we do not support this motor brand: {brand}. We currently support feetech and dynamixel motors."
         )
 
-def interpret_feetech_status(status_byte):
-    """Interprets the Feetech servo status byte into a human-readable string."""
-    if status_byte is None:
-        return "Status not available"
-    
-    errors = []
-    # Common Feetech Status Bits (may vary slightly by model, check datasheet for STS3215 specifically if issues persist)
-    if status_byte & 0x01: errors.append("Overload Error")         # Bit 0
-    if status_byte & 0x02: errors.append("Overvoltage Error")      # Bit 1
-    if status_byte & 0x04: errors.append("Overtemperature Error") # Bit 2
+# Common Feetech Status Bits (may vary slightly by model, check datasheet for STS3215 specifically if issues persist)
+_STATUS_LABELS = (
+    (0x01, "Overload Error"),         # Bit 0
+    (0x02, "Overvoltage Error"),      # Bit 1
+    (0x04, "Overtemperature Error"), # Bit 2
     # Bit 3 can be Stall or Angle Limit depending on context/model. Let's call it Generic Movement Error.
-    if status_byte & 0x08: errors.append("Movement/Angle Limit Error/Stall") # Bit 3 
-    if status_byte & 0x10: errors.append("Access Error/Invalid Page") # Bit 4 (Sometimes EEPROM access related or invalid register page)
-    if status_byte & 0x20: errors.append("Instruction Error")      # Bit 5
-    if status_byte & 0x40: errors.append("Driver Fault")           # Bit 6 (Less common, but some servos have it)
+    (0x08, "Movement/Angle Limit Error/Stall"), # Bit 3
+    (0x10, "Access Error/Invalid Page"), # Bit 4 (Sometimes EEPROM access related or invalid register page)
+    (0x20, "Instruction Error"),      # Bit 5
+    (0x40, "Driver Fault"),           # Bit 6 (Less common, but some servos have it)
     # Bit 7 is often checksum error or unused
+)
+
+def _describe_feetech_status(status_byte):
+    errors = [label for mask, label in _STATUS_LABELS if status_byte & mask]
 
     if not errors and status_byte == 0:
         return "OK (0)"
@@ -52,8 +62,117 @@ def interpret_feetech_status(status_byte):
     else:
         return f"Error(s) detected: {', '.join(errors)} (Raw: {status_byte}, Binary: {status_byte:08b})"
 
-def set_motor_target_position(port, brand, model, motor_id, baudrate, target_position):
-    """Connects to a specific motor, sets its lock and torque, and moves it to a target position."""
+# Description of every possible status byte, decoded once
+_STATUS_CACHE = [_describe_feetech_status(status_byte) for status_byte in range(256)]
+
+def interpret_feetech_status(status_byte):
+    """Interprets the Feetech servo status byte into a human-readable string."""
+    if status_byte is None:
+        return "Status not available"
+    return _STATUS_CACHE[status_byte]
+
+def _wait_for_register_eq(motor_bus, motor_name, data_name, value, timeout=0.02, dt=0.002):
+    """Poll a register of a motor until it reads back the value just written to it.
+
+    Returns the last value read, which differs from `value` if the timeout elapsed first.
+    """
+    t0 = time.monotonic()
+    while True:
+        current = motor_bus.read(data_name, motor_names=motor_name)[0]
+        if current == value or time.monotonic() - t0 >= timeout:
+            return current
+        time.sleep(dt)
+
+# Feetech servos do not report on their own when a move is done, their Moving flag is polled instead
+# at about the round trip time of a short READ at 1Mbaud with the port in low latency mode
+MOVING_POLL_INTERVAL = 0.0015
+
+def _wait_until_arrived(motor_bus, motor_name, target, tol=10, timeout=1.5, dt=0.01, check_moving=False):
+    """Poll the position of a motor until it is within `tol` of `target` or the timeout elapses.
+
+    With `check_moving` (Feetech), the motor must also report that it stopped moving, the position
+    and the Moving flag are then read together with a single READ.
+    Returns the last position read.
+    """
+    if check_moving:
+        block = resolve_register_block(motor_bus, motor_name, ["Present_Position", "Moving"])
+        position = None
+    t0 = time.monotonic()
+    while True:
+        if check_moving:
+            try:
+                values = read_register_block(motor_bus, block)
+                # Same full rotation tracking as `motor_bus.read("Present_Position")`, which the monitor
+                # and the other commands use, so it follows the whole move
+                position = motor_bus.avoid_rotation_reset(
+                    [values["Present_Position"]], [motor_name], "Present_Position"
+                )[0]
+                moving = values["Moving"]
+            except ConnectionError:
+                # A poll failed (dropped or corrupt reply), keep polling until the timeout
+                if time.monotonic() - t0 >= timeout:
+                    if position is None:
+                        raise
+                    return position
+                time.sleep(dt)
+                continue
+        else:
+            position = motor_bus.read("Present_Position", motor_names=motor_name)[0]
+            moving = 0
+        if abs(position - target) <= tol and moving == 0:
+            return position
+        if time.monotonic() - t0 >= timeout:
+            return position
+        time.sleep(dt)
+
+def read_motor_state(motor_bus, motor_name, brand):
+    """Read the position (and status for Feetech, else None) of a motor.
+
+    Returns:
+        tuple: (position, status), both None if the motor could not be read
+    """
+    try:
+        position = motor_bus.read("Present_Position", motor_names=motor_name)[0]
+        status = motor_bus.read("Status", motor_names=motor_name)[0] if brand == "feetech" else None
+    except Exception:
+        return None, None
+    return position, status
+
+def connect_motor_bus(port, brand, baudrate):
+    """Connects to the motors bus of a port, to be shared by the commands sent to its motors.
+
+    Returns None if the connection failed.
+    """
+    motor_bus_config_cls, motor_bus_cls, _, _ = get_motor_bus_cls(brand)
+
+    # Motors are registered on the bus by `set_motor_target_position` as they are used
+    config = motor_bus_config_cls(port=port, motors={})
+    motor_bus = motor_bus_cls(config=config)
+
+    try:
+        print(f"\nAttempting to connect to motors bus on port {port}...")
+        motor_bus.connect()
+        motor_bus.set_bus_baudrate(baudrate)
+        set_low_latency(motor_bus)
+        print(f"Connected to port {port}. Baudrate set to {baudrate}.")
+    except Exception as e:
+        print(f"Could not connect to motors bus on port {port}: {e}")
+        if motor_bus.is_connected:
+            motor_bus.disconnect()
+        return None
+
+    return motor_bus
+
+def set_motor_target_position(
+    port, brand, model, motor_id, baudrate, target_position, motor_bus=None, verbose=False, current_position=None
+):
+    """Connects to a specific motor, sets its lock and torque, and moves it to a target position.
+
+    If `motor_bus` is given (see `connect_motor_bus`), the motor is driven through it and it stays
+    connected afterwards, otherwise a bus is connected for this command only.
+    With `verbose`, the parameters are dumped and every register written is read back.
+    `current_position` is the position of the motor if it is already known (see `_bus_worker`).
+    """
     motor_bus_config_cls, motor_bus_cls, model_baudrate_table, _ = get_motor_bus_cls(brand)
 
     if model not in model_baudrate_table:
@@ -61,79 +180,110 @@ def set_motor_target_position(port, brand, model, motor_id, baudrate, target_pos
         return
 
     motor_name = f"motor_interactive_{motor_id}"
-    config = motor_bus_config_cls(port=port, motors={motor_name: (motor_id, model)})
-    motor_bus = motor_bus_cls(config=config)
+    owns_bus = motor_bus is None
+    if owns_bus:
+        config = motor_bus_config_cls(port=port, motors={motor_name: (motor_id, model)})
+        motor_bus = motor_bus_cls(config=config)
+    else:
+        if motor_name not in motor_bus.motors:
+            # The Feetech bus sizes its rotation tracking on the first position read, give the new
+            # motor its own slot or reading its position fails
+            for track in getattr(motor_bus, "track_positions", {}).values():
+                track["prev"].append(None)
+                track["below_zero"].append(False)
+                track["above_max"].append(False)
+        motor_bus.motors[motor_name] = (motor_id, model)
 
     try:
-        print(f"\nAttempting to connect to motor ID {motor_id} on port {port}...")
-        motor_bus.connect()
-        motor_bus.set_bus_baudrate(baudrate)
-        print(f"Connected to motor ID {motor_id}. Baudrate set to {baudrate}.")
+        if owns_bus:
+            print(f"\nAttempting to connect to motor ID {motor_id} on port {port}...")
+            motor_bus.connect()
+            motor_bus.set_bus_baudrate(baudrate)
+            set_low_latency(motor_bus)
+            print(f"Connected to motor ID {motor_id}. Baudrate set to {baudrate}.")
 
         if brand == "feetech":
             # --- Read initial critical parameters ---
-            print(f"--- Reading initial parameters for motor ID {motor_id} ---")
+            initial_values = None
+            if verbose:
+                print(f"--- Reading initial parameters for motor ID {motor_id} ---")
             try:
                 params_to_read = ["Mode", "Lock", "Torque_Enable", "Min_Angle_Limit", "Max_Angle_Limit", "Max_Torque_Limit", "Torque_Limit", "Acceleration"]
-                for param_name in params_to_read:
-                    val = motor_bus.read(param_name, motor_names=motor_name)[0]
-                    print(f"Initial {param_name}: {val}")
-                status_val_initial = motor_bus.read("Status", motor_names=motor_name)[0]
-                print(f"Initial Status: {interpret_feetech_status(status_val_initial)}")
+                # One READ for all the parameters and the status instead of one per register
+                initial_block = resolve_register_block(motor_bus, motor_name, params_to_read + ["Status"])
+                initial_values = read_register_block(motor_bus, initial_block)
+                if verbose:
+                    for param_name in params_to_read:
+                        print(f"Initial {param_name}: {initial_values[param_name]}")
+                    status_val_initial = initial_values["Status"]
+                    print(f"Initial Status: {interpret_feetech_status(status_val_initial)}")
             except Exception as e:
                 print(f"Error reading initial parameters for motor ID {motor_id}: {e}")
-            print("----------------------------------------------------")
+            if verbose:
+                print("----------------------------------------------------")
 
             try:
-                initial_mode = motor_bus.read("Mode", motor_names=motor_name)[0]
-                print(f"Motor ID {motor_id} initial 'Mode' status (re-read): {initial_mode} (0 is usually position servo mode)")
+                # Only read the mode again if the initial parameters could not be read
+                if initial_values is not None:
+                    initial_mode = initial_values["Mode"]
+                else:
+                    initial_mode = motor_bus.read("Mode", motor_names=motor_name)[0]
+                if verbose:
+                    print(f"Motor ID {motor_id} initial 'Mode' status: {initial_mode} (0 is usually position servo mode)")
                 if initial_mode != 0:
                     print(f"Attempting to set motor ID {motor_id} to Mode 0 (position servo mode)...")
                     motor_bus.write("Mode", 0, motor_names=motor_name)
-                    time.sleep(0.1)
-                    current_mode = motor_bus.read("Mode", motor_names=motor_name)[0]
-                    print(f"Motor ID {motor_id} 'Mode' status after setting to 0: {current_mode}")
+                    if verbose:
+                        current_mode = _wait_for_register_eq(motor_bus, motor_name, "Mode", 0)
+                        print(f"Motor ID {motor_id} 'Mode' status after setting to 0: {current_mode}")
             except Exception as e:
                 print(f"Could not read/write 'Mode' status for motor ID {motor_id}: {e}")
 
             print(f"Unlocking motor ID {motor_id}...")
             motor_bus.write("Lock", 0, motor_names=motor_name)
-            time.sleep(0.1)
-            try:
-                lock_status = motor_bus.read("Lock", motor_names=motor_name)[0]
-                print(f"Motor ID {motor_id} 'Lock' status after setting to 0: {lock_status} (0 means unlocked)")
-            except Exception as e:
-                print(f"Could not read 'Lock' status for motor ID {motor_id}: {e}")
+            if verbose:
+                try:
+                    lock_status = _wait_for_register_eq(motor_bus, motor_name, "Lock", 0)
+                    print(f"Motor ID {motor_id} 'Lock' status after setting to 0: {lock_status} (0 means unlocked)")
+                except Exception as e:
+                    print(f"Could not read 'Lock' status for motor ID {motor_id}: {e}")
 
             print(f"Enabling torque for motor ID {motor_id}...")
             motor_bus.write("Torque_Enable", 1, motor_names=motor_name)
-            time.sleep(0.1)
-            try:
-                torque_status = motor_bus.read("Torque_Enable", motor_names=motor_name)[0]
-                print(f"Motor ID {motor_id} 'Torque_Enable' status after setting to 1: {torque_status} (1 means enabled)")
-            except Exception as e:
-                print(f"Could not read 'Torque_Enable' status for motor ID {motor_id}: {e}")
+            if verbose:
+                try:
+                    torque_status = _wait_for_register_eq(motor_bus, motor_name, "Torque_Enable", 1)
+                    print(f"Motor ID {motor_id} 'Torque_Enable' status after setting to 1: {torque_status} (1 means enabled)")
+                except Exception as e:
+                    print(f"Could not read 'Torque_Enable' status for motor ID {motor_id}: {e}")
             
+        if brand == "feetech" and verbose:
             try:
-                status_val = motor_bus.read("Status", motor_names=motor_name)[0]
+                params_to_read = ["Min_Angle_Limit", "Max_Angle_Limit", "Max_Torque_Limit", "Torque_Limit", "Acceleration"]
+                block = resolve_register_block(motor_bus, motor_name, params_to_read + ["Status"])
+                values = read_register_block(motor_bus, block)
+                status_val = values["Status"]
                 print(f"Motor ID {motor_id} status after torque enable sequence: {interpret_feetech_status(status_val)}")
                  # --- Read parameters again after torque enable ---
                 print(f"--- Reading parameters for motor ID {motor_id} AFTER torque enable ---")
-                for param_name in ["Min_Angle_Limit", "Max_Angle_Limit", "Max_Torque_Limit", "Torque_Limit", "Acceleration"]:
-                    val = motor_bus.read(param_name, motor_names=motor_name)[0]
-                    print(f"After Torque Enable - {param_name}: {val}")
+                for param_name in params_to_read:
+                    print(f"After Torque Enable - {param_name}: {values[param_name]}")
                 print("----------------------------------------------------------")
             except Exception as e:
                 print(f"Could not read status/parameters for motor ID {motor_id} after torque enable: {e}")
 
-        current_position = motor_bus.read("Present_Position", motor_names=motor_name)[0]
-        print(f"Motor ID {motor_id} current position: {current_position}")
+        if verbose:
+            if current_position is None:
+                current_position = motor_bus.read("Present_Position", motor_names=motor_name)[0]
+            print(f"Motor ID {motor_id} current position: {current_position}")
 
         print(f"Moving motor ID {motor_id} to target position: {target_position}")
         motor_bus.write("Goal_Position", int(target_position), motor_names=motor_name)
-        time.sleep(1.5)  # Wait for the motor to move
-
-        final_position = motor_bus.read("Present_Position", motor_names=motor_name)[0]
+        # Wait for the motor to move, up to 1.5s
+        final_position = _wait_until_arrived(
+            motor_bus, motor_name, int(target_position), check_moving=(brand == "feetech"),
+            dt=MOVING_POLL_INTERVAL if brand == "feetech" else 0.01,
+        )
         print(f"Motor ID {motor_id} final position: {final_position}")
 
         if brand == "feetech":
@@ -160,7 +310,10 @@ def set_motor_target_position(port, brand, model, motor_id, baudrate, target_pos
     except Exception as e:
         print(f"An unexpected error occurred with motor ID {motor_id} on port {port}: {e}")
     finally:
-        if motor_bus.is_connected:
+        if not owns_bus:
+            # The shared bus is disconnected by its owner
+            pass
+        elif motor_bus.is_connected:
             print(f"Disconnecting from motor ID {motor_id} on port {port}.")
             # Optionally, disable torque after operation if desired for safety/manual adjustment
             # if brand == "feetech":
@@ -169,11 +322,69 @@ def set_motor_target_position(port, brand, model, motor_id, baudrate, target_pos
         else:
             print(f"Motor bus for motor ID {motor_id} was not connected or already disconnected.")
 
+def _bus_worker(port, brand, model, baudrate, verbose, cmd_queue, resp_queue, monitor_interval=0.02):
+    """Owns the motors bus in its own process and runs the commands sent by `main`.
+
+    Commands are dicts with an "op": "move" (with the motor "id" and target "pos"), "state" (the last
+    motor moved and its latest position and status) or "quit". Every command gets a response once
+    done. While waiting for the next command, the last motor moved is read every `monitor_interval`.
+    The first response tells whether the bus could be connected.
+    """
+    motor_bus = connect_motor_bus(port, brand, baudrate)
+    resp_queue.put(motor_bus is not None)
+    if motor_bus is None:
+        return
+
+    # Last motor moved and its latest state, read while the user types the next command
+    monitored = {"motor_id": None, "position": None, "status": None}
+
+    try:
+        while True:
+            try:
+                cmd = cmd_queue.get(timeout=monitor_interval)
+            except queue.Empty:
+                if monitored["motor_id"] is not None:
+                    motor_name = f"motor_interactive_{monitored['motor_id']}"
+                    monitored["position"], monitored["status"] = read_motor_state(motor_bus, motor_name, brand)
+                continue
+
+            if cmd["op"] == "quit":
+                break
+            elif cmd["op"] == "state":
+                resp_queue.put(dict(monitored))
+            elif cmd["op"] == "move":
+                current_position = monitored["position"] if monitored["motor_id"] == cmd["id"] else None
+                set_motor_target_position(
+                    port, brand, model, cmd["id"], baudrate, cmd["pos"],
+                    motor_bus=motor_bus, verbose=verbose, current_position=current_position,
+                )
+                # The prompt of the main process comes after everything printed for the move
+                sys.stdout.flush()
+                resp_queue.put(True)
+                position, status = read_motor_state(motor_bus, f"motor_interactive_{cmd['id']}", brand)
+                monitored = {"motor_id": cmd["id"], "position": position, "status": status}
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if motor_bus.is_connected:
+            print(f"Disconnecting from motors bus on port {port}.")
+            motor_bus.disconnect()
+
+def _get_response(resp_queue, bus_process):
+    """Wait for the response of the bus process, raising if it exited instead."""
+    while True:
+        try:
+            return resp_queue.get(timeout=0.5)
+        except queue.Empty:
+            if not bus_process.is_alive():
+                raise ConnectionError("The motors bus process exited") from None
+
 def main():
     parser = argparse.ArgumentParser(description="Interactively control follower arm motors.")
     parser.add_argument("--brand", type=str, default="feetech", help="Motor brand (default: feetech)")
     parser.add_argument("--model", type=str, default="sts3215", help="Motor model (default: sts3215)")
     parser.add_argument("--baudrate", type=int, default=1000000, help="Baudrate for communication (default: 1000000)")
+    parser.add_argument("--verbose", action="store_true", help="Dump the motor parameters and read back every register written")
     
     args = parser.parse_args()
 
@@ -193,8 +404,17 @@ def main():
     print(f"Motor settings - Brand: {args.brand}, Model: {args.model}, Baudrate: {args.baudrate}")
     print("Enter motor ID and target position when prompted. Type 'quit' for motor ID to exit.")
 
+    # The motors bus is connected once, in its own process started with the first command, so the
+    # prompt never waits on bus I/O and the bus is monitored while the user types (see `_bus_worker`)
+    bus_process = None
+    cmd_queue = resp_queue = None
+
     while True:
         try:
+            if bus_process is not None and not bus_process.is_alive():
+                print("The motors bus process exited, it will be restarted with the next command.")
+                bus_process = None
+
             motor_id_str = input("\nEnter Motor ID (e.g., 1) or type 'quit' to exit: ")
             if motor_id_str.lower() == 'quit':
                 print("Exiting interactive motor control.")
@@ -205,11 +425,36 @@ def main():
                 print("Invalid motor ID. Please enter a number in the valid range (e.g., 1-252).")
                 continue
 
-            target_position_str = input(f"Enter target position for motor ID {motor_id} (e.g., 2048): ")
+            # Show the state of the motor when it is the one monitored
+            prompt_hint = "e.g., 2048"
+            if bus_process is not None:
+                cmd_queue.put({"op": "state"})
+                state = _get_response(resp_queue, bus_process)
+                if state["motor_id"] == motor_id and state["position"] is not None:
+                    prompt_hint = f"current: {state['position']}"
+                    if state["status"] is not None:
+                        prompt_hint += f", status: {interpret_feetech_status(state['status'])}"
+
+            target_position_str = input(f"Enter target position for motor ID {motor_id} ({prompt_hint}): ")
             target_position = int(target_position_str)
             # You might want to add validation for target_position range if known (e.g., 0-4095 for some motors)
 
-            set_motor_target_position(follower_arm_port, args.brand, args.model, motor_id, args.baudrate, target_position)
+            if bus_process is None:
+                cmd_queue, resp_queue = mp.Queue(), mp.Queue()
+                bus_process = mp.Process(
+                    target=_bus_worker,
+                    args=(follower_arm_port, args.brand, args.model, args.baudrate, args.verbose, cmd_queue, resp_queue),
+                    daemon=True,
+                )
+                bus_process.start()
+                if not _get_response(resp_queue, bus_process):
+                    bus_process.join()
+                    bus_process = None
+                    continue
+
+            # Wait for the move to be done before prompting again
+            cmd_queue.put({"op": "move", "id": motor_id, "pos": target_position})
+            _get_response(resp_queue, bus_process)
         
         except ValueError:
             print("Invalid input. Motor ID and target position must be integers.")
@@ -220,6 +465,12 @@ def main():
             print(f"An unexpected error occurred in the main loop: {e}")
             # Decide if you want to break or continue on other errors
 
+    if bus_process is not None:
+        cmd_queue.put({"op": "quit"})
+        bus_process.join(timeout=5)
+        if bus_process.is_alive():
+            bus_process.terminate()
+
     print("Interactive motor control session ended.")
 
 if __name__ == "__main__":
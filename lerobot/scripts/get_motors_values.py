@@ -1,8 +1,17 @@
 #!/usr/bin/env python3
 
 import argparse
+import sys
 import time
 
+import numpy as np
+from lerobot.common.robot_devices.motors.utils import (
+    read_register_block,
+    resolve_register_block,
+    set_low_latency,
+    use_select_reads,
+)
+
 def get_motor_bus_cls(brand: str) -> tuple:
     """Get the appropriate motor bus class and configuration based on the brand."""
     if brand == "feetech":
@@ -30,8 +39,14 @@ def get_motor_bus_cls(brand: str) -> tuple:
             f"Currently we do not support this motor brand: {brand}. We currently support feetech and dynamixel motors."
         )
 
-def read_motor_position(port, brand, model, motor_id, baudrate=1000000):
-    """Connect to a motor and read its current position."""
+# Minimum time between two printed positions, the reads themselves are not throttled
+PRINT_INTERVAL = 0.05
+
+def read_motor_position(port, brand, model, motor_id, baudrate=1000000, rate_hz=None):
+    """Connect to a motor and read its current position.
+
+    The position is read as fast as the bus allows, or at `rate_hz` if given.
+    """
     # Get the appropriate classes for the motor brand
     motor_bus_config_cls, motor_bus_cls, model_baudrate_table, series_baudrate_table = get_motor_bus_cls(brand)
 
@@ -56,21 +71,46 @@ def read_motor_position(port, brand, model, motor_id, baudrate=1000000):
         
         # Set the baudrate
         motor_bus.set_bus_baudrate(baudrate)
+        set_low_latency(motor_bus)
+        use_select_reads(motor_bus)
         
+        # Registers resolved once, the loop then only sends the READ
+        if brand == "feetech":
+            position_block = resolve_register_block(motor_bus, motor_name, ["Present_Position", "Offset"])
+        
+        last_print = 0.0
         while True:
             try:
-                # Read the current position
-                position = motor_bus.read("Present_Position")
-                print(f"Current Position: {position}", end='\r')
+                loop_start = time.monotonic()
                 
-                # For Feetech motors, also read the offset value
+                # For Feetech motors, read the offset value along with the position, in the same request
                 if brand == "feetech":
-                    offset = motor_bus.read("Offset")
-                    adjusted_position = position - offset
-                    print(f"Current Position: {position}, Offset: {offset}, Adjusted: {adjusted_position}", end='\r')
+                    values = read_register_block(motor_bus, position_block)
+                    # Same full rotation tracking as `motor_bus.read("Present_Position")`
+                    position = motor_bus.avoid_rotation_reset(
+                        np.array([values["Present_Position"]], dtype=np.int32), [motor_name], "Present_Position"
+                    )
+                    offset = np.array([values["Offset"]])
+                else:
+                    # Read the current position
+                    position = motor_bus.read("Present_Position")
+                
+                # Only format and refresh the terminal every PRINT_INTERVAL, in a single write
+                now = time.monotonic()
+                if now - last_print >= PRINT_INTERVAL:
+                    if brand == "feetech":
+                        status = f"Current Position: {position}, Offset: {offset}, Adjusted: {position - offset}"
+                    else:
+                        status = f"Current Position: {position}"
+                    sys.stdout.write("\r" + status)
+                    sys.stdout.flush()
+                    last_print = now
                 
-                # Small delay to prevent overwhelming the motor
-                time.sleep(0.1)
+                # The bus round trip paces the loop, unless a rate is set, then sleep what is left of the period
+                if rate_hz:
+                    time.sleep(max(0.0, 1.0 / rate_hz - (time.monotonic() - loop_start)))
+                else:
+                    time.sleep(0)
                 
             except KeyboardInterrupt:
                 print("\nStopping position reading...")
@@ -94,7 +134,8 @@ if __name__ == "__main__":
     parser.add_argument("--model", type=str, required=True, help="Motor model (e.g. xl330-m077, sts3215)")
     parser.add_argument("--id", type=int, required=True, help="ID of the motor to read (e.g. 1, 2, 3)")
     parser.add_argument("--baudrate", type=int, default=1000000, help="Baudrate for communication (default: 1000000)")
+    parser.add_argument("--rate-hz", type=float, default=None, help="Reading rate in Hz (default: as fast as the bus allows)")
     
     args = parser.parse_args()
     
-    read_motor_position(args.port, args.brand, args.model, args.id, args.baudrate)
\ No newline at end of file
+    read_motor_position(args.port, args.brand, args.model, args.id, args.baudrate, args.rate_hz)
\ No newline at end of file
@@ -4,6 +4,7 @@ import argparse
 import time
 import sys
 from typing import List, Tuple
+from lerobot.common.robot_devices.motors.utils import set_low_latency, use_select_reads
 
 def get_motor_bus_cls(brand: str) -> tuple:
     """Get the appropriate motor bus class and configuration based on the brand."""
@@ -16,46 +17,56 @@ def get_motor_bus_cls(brand: str) -> tuple:
     else:
         raise ValueError(f"Currently we only support feetech motors for this test.")
 
-def progressive_motor_test(port: str, brand: str, model: str, motor_ids: List[int], baudrate: int=1000000):
-    """Progressively test communication with an increasing number of motors."""
+# Settling delay after the baudrate of the bus is set
+BUS_STARTUP_DELAY = 0.01
+
+def progressive_motor_test(port: str, brand: str, model: str, motor_ids: List[int], baudrate: int=1000000, settle_ms: float=0):
+    """Progressively test communication with an increasing number of motors.
+
+    The bus is connected once for all the tests. `settle_ms` is the pause between the tests of two
+    motor counts.
+    """
     motor_bus_config_cls, motor_bus_cls = get_motor_bus_cls(brand)
     
     print(f"Starting progressive motor testing on port {port}")
     print(f"Will test {len(motor_ids)} motors with IDs: {motor_ids}")
     
     # Create a dictionary of motor configurations
-    all_motors = {}
-    for i, motor_id in enumerate(motor_ids):
-        motor_name = f"motor_{i+1}"
-        all_motors[motor_name] = (motor_id, model)
+    all_motors = {f"motor_{i+1}": (motor_id, model) for i, motor_id in enumerate(motor_ids)}
+    all_motor_names = list(all_motors)
     
-    # Test with increasing number of motors
-    for num_motors in range(1, len(motor_ids) + 1):
-        test_motors = {}
-        motor_names = []
-        
-        # Select the first num_motors motors
-        for i in range(num_motors):
-            motor_name = f"motor_{i+1}"
-            test_motors[motor_name] = all_motors[motor_name]
-            motor_names.append(motor_name)
-        
-        print(f"\n{'='*60}")
-        print(f"Testing with {num_motors} motor(s): {[test_motors[name][0] for name in motor_names]}")
-        print(f"{'='*60}")
-        
-        # Configure and connect to the motors
-        config = motor_bus_config_cls(port=port, motors=test_motors)
-        motor_bus = motor_bus_cls(config=config)
-        
-        try:
-            # Connect to the motor bus
-            print("Connecting to motor bus...")
-            motor_bus.connect()
-            motor_bus.set_bus_baudrate(baudrate)
-            print("Successfully connected!")
+    # Configure and connect to all the motors once, each test then addresses the first motors only
+    config = motor_bus_config_cls(port=port, motors=all_motors)
+    motor_bus = motor_bus_cls(config=config)
+    
+    try:
+        # Connect to the motor bus
+        print("Connecting to motor bus...")
+        motor_bus.connect()
+        motor_bus.set_bus_baudrate(baudrate)
+        set_low_latency(motor_bus)
+        use_select_reads(motor_bus)
+        time.sleep(BUS_STARTUP_DELAY)
+        print("Successfully connected!")
+    except Exception as e:
+        print(f"ERROR: Failed to connect to the motor bus")
+        print(f"Error details: {e}")
+        if motor_bus.is_connected:
+            motor_bus.disconnect()
+        return
+    
+    try:
+        # Test with increasing number of motors
+        for num_motors in range(1, len(motor_ids) + 1):
+            # Select the first num_motors motors
+            motor_names = all_motor_names[:num_motors]
+            
+            print(f"\n{'='*60}")
+            print(f"Testing with {num_motors} motor(s): {[all_motors[name][0] for name in motor_names]}")
+            print(f"{'='*60}")
             
             # Try to read positions multiple times
+            positions = None
             for attempt in range(1, 6):
                 try:
                     print(f"\nAttempt {attempt} to read positions:")
@@ -65,7 +76,6 @@ def progressive_motor_test(port: str, brand: str, model: str, motor_ids: List[in
                     
                     print(f"SUCCESS: Read completed in {elapsed:.4f} seconds")
                     print(f"Positions: {positions}")
-                    time.sleep(0.5)  # Short delay between reads
                     
                 except Exception as e:
                     print(f"ERROR: Failed to read positions on attempt {attempt}")
@@ -73,33 +83,30 @@ def progressive_motor_test(port: str, brand: str, model: str, motor_ids: List[in
                     # Continue with the next attempt rather than breaking
             
             # Try to write positions
-            try:
-                print("\nAttempting to write positions (just current positions)...")
-                start_time = time.time()
-                motor_bus.write("Goal_Position", positions, motor_names)
-                elapsed = time.time() - start_time
-                print(f"SUCCESS: Write completed in {elapsed:.4f} seconds")
-            except Exception as e:
-                print(f"ERROR: Failed to write positions")
-                print(f"Error details: {e}")
-            
-            # Brief pause before disconnecting
-            time.sleep(1)
+            if positions is None:
+                print("\nSkipping the write, no positions could be read")
+            else:
+                try:
+                    print("\nAttempting to write positions (just current positions)...")
+                    start_time = time.time()
+                    motor_bus.write("Goal_Position", positions, motor_names)
+                    elapsed = time.time() - start_time
+                    print(f"SUCCESS: Write completed in {elapsed:.4f} seconds")
+                except Exception as e:
+                    print(f"ERROR: Failed to write positions")
+                    print(f"Error details: {e}")
             
+            # Optional pause between tests. If this ever runs in an async context,
+            # time.sleep(0) (or awaiting asyncio.sleep(0)) is enough to yield to other tasks
+            time.sleep(settle_ms / 1000)
+    
+    finally:
+        # Always disconnect from the motor bus
+        try:
+            motor_bus.disconnect()
+            print(f"Disconnected from motor bus with {len(motor_ids)} motors")
         except Exception as e:
-            print(f"ERROR: Failed during setup with {num_motors} motors")
-            print(f"Error details: {e}")
-        
-        finally:
-            # Always disconnect from the motor bus
-            try:
-                motor_bus.disconnect()
-                print(f"Disconnected from motor bus with {num_motors} motors")
-            except Exception as e:
-                print(f"Error during disconnect: {e}")
-            
-            # Give a bit more time between tests
-            time.sleep(2)
+            print(f"Error during disconnect: {e}")
     
     print("\nProgressive motor testing complete!")
 
@@ -111,12 +118,14 @@ if __name__ == "__main__":
     parser.add_argument("--baudrate", type=int, default=1000000, help="Baudrate for communication (default: 1000000)")
     parser.add_argument("--ids", type=int, nargs="+", default=[1, 2, 3, 4, 5, 6], 
                         help="IDs of motors to test (default: 1 2 3 4 5 6)")
+    parser.add_argument("--settle-ms", type=float, default=0,
+                        help="Pause in ms between tests (default: 0)")
     
     args = parser.parse_args()
     
     # Run the progressive test
     try:
-        progressive_motor_test(args.port, args.brand, args.model, args.ids, args.baudrate)
+        progressive_motor_test(args.port, args.brand, args.model, args.ids, args.baudrate, args.settle_ms)
     except KeyboardInterrupt:
         print("\nTest interrupted by user. Exiting...")
         sys.exit(0)
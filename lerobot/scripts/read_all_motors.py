@@ -2,7 +2,9 @@
 
 import argparse
 import time
+from concurrent.futures import ThreadPoolExecutor
 from lerobot.common.robot_devices.robots.configs import So100RobotConfig
+from lerobot.common.robot_devices.motors.utils import set_low_latency
 
 def get_motor_bus_cls(brand: str) -> tuple:
     """Get the appropriate motor bus class and configuration based on the brand."""
@@ -31,6 +33,49 @@ def get_motor_bus_cls(brand: str) -> tuple:
             f"Currently we do not support this motor brand: {brand}. We currently support feetech and dynamixel motors."
         )
 
+def read_arm_motors(motor_bus_config_cls, motor_bus_cls, port, arm_name, brand, model, motor_ids, baudrate):
+    """Read the position (and offset for Feetech) of all the motors of one arm.
+    
+    All the motors are read together with a single sync read per register. If that fails,
+    e.g. because a motor does not answer, they are read one by one on the same bus.
+    
+    Returns:
+        dict: Motor ID to (position, offset), None for the values that could not be read
+    """
+    motor_names = [f"motor_{motor_id}" for motor_id in motor_ids]
+    config = motor_bus_config_cls(port=port, motors={name: (motor_id, model) for name, motor_id in zip(motor_names, motor_ids, strict=True)})
+    motor_bus = motor_bus_cls(config=config)
+    
+    try:
+        motor_bus.connect()
+        motor_bus.set_bus_baudrate(baudrate)
+        set_low_latency(motor_bus)
+    except Exception as e:
+        print(f"{arm_name} arm connection error: {e}")
+        return {}
+    
+    def read_register(data_name):
+        try:
+            return dict(zip(motor_ids, motor_bus.read(data_name, motor_names), strict=True))
+        except Exception as e:
+            print(f"{arm_name} arm sync read of {data_name} failed ({e}), reading motors one by one")
+        
+        values = {}
+        for motor_id, motor_name in zip(motor_ids, motor_names, strict=True):
+            try:
+                values[motor_id] = motor_bus.read(data_name, motor_name)[0]
+            except Exception as e:
+                print(f"{arm_name} arm motor {motor_id} error: {e}")
+        return values
+    
+    try:
+        positions = read_register("Present_Position")
+        offsets = read_register("Offset") if brand == "feetech" else {}
+    finally:
+        motor_bus.disconnect()
+    
+    return {motor_id: (positions.get(motor_id), offsets.get(motor_id)) for motor_id in motor_ids}
+
 def read_motor_position(port1, port2, brand, model, baudrate=1000000):
     """Connect to motors on two ports and read their current positions."""
     # Get the appropriate classes for the motor brand
@@ -45,51 +90,26 @@ def read_motor_position(port1, port2, brand, model, baudrate=1000000):
     print(f"Reading positions for {brand} {model} motors on both arms")
     print("Press Ctrl+C at any time to stop")
     
+    motor_ids = list(range(1, 7))
+    
     try:
+        # Read all the motors of each arm at once, both arms in parallel since their ports are independent
+        with ThreadPoolExecutor(max_workers=2 if port1 != port2 else 1) as executor:
+            leader_future = executor.submit(
+                read_arm_motors, motor_bus_config_cls, motor_bus_cls, port1, "Leader", brand, model, motor_ids, baudrate
+            )
+            follower_future = executor.submit(
+                read_arm_motors, motor_bus_config_cls, motor_bus_cls, port2, "Follower", brand, model, motor_ids, baudrate
+            )
+            leader_results = leader_future.result()
+            follower_results = follower_future.result()
+        
         # Iterate through motor IDs 1-6
-        for motor_id in range(1, 7):
+        for motor_id in motor_ids:
             print(f"\n--- Reading Motor ID {motor_id} on both arms ---")
             
-            leader_position = None
-            leader_offset = None
-            follower_position = None
-            follower_offset = None
-            
-            # Read leader arm motor
-            try:
-                motor_name = f"motor_{motor_id}"
-                config = motor_bus_config_cls(port=port1, motors={motor_name: (motor_id, model)})
-                leader_bus = motor_bus_cls(config=config)
-                leader_bus.connect()
-                leader_bus.set_bus_baudrate(baudrate)
-                
-                leader_position = leader_bus.read("Present_Position")
-                if brand == "feetech":
-                    try:
-                        leader_offset = leader_bus.read("Offset")
-                    except:
-                        pass
-                leader_bus.disconnect()
-            except Exception as e:
-                print(f"Leader arm motor {motor_id} error: {e}")
-            
-            # Read follower arm motor
-            try:
-                motor_name = f"motor_{motor_id}"
-                config = motor_bus_config_cls(port=port2, motors={motor_name: (motor_id, model)})
-                follower_bus = motor_bus_cls(config=config)
-                follower_bus.connect()
-                follower_bus.set_bus_baudrate(baudrate)
-                
-                follower_position = follower_bus.read("Present_Position")
-                if brand == "feetech":
-                    try:
-                        follower_offset = follower_bus.read("Offset")
-                    except:
-                        pass
-                follower_bus.disconnect()
-            except Exception as e:
-                print(f"Follower arm motor {motor_id} error: {e}")
+            leader_position, leader_offset = leader_results.get(motor_id, (None, None))
+            follower_position, follower_offset = follower_results.get(motor_id, (None, None))
             
             # Print results and calculate differences
             print(f"Motor ID {motor_id}:")
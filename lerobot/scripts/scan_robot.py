@@ -1,47 +1,128 @@
 #!/usr/bin/env python3
 
 import argparse
-import time
+import asyncio
+import contextlib
+import io
 import sys
-from typing import List, Dict, Tuple
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
+# Memoized, the interactive and scanning loops look the classes up for every motor
+@lru_cache(maxsize=2)
 def get_motor_bus_cls(brand: str) -> tuple:
-    """Get the appropriate motor bus class and configuration based on the brand."""
+    """Get the appropriate motor bus class and configuration based on the brand.
+
+    Also returns the frozenset of the supported models, to check a model against, and the control
+    table of each model.
+    """
     if brand == "feetech":
         from lerobot.common.robot_devices.motors.configs import FeetechMotorsBusConfig
         from lerobot.common.robot_devices.motors.feetech import (
             MODEL_BAUDRATE_TABLE,
+            MODEL_CONTROL_TABLE,
             SCS_SERIES_BAUDRATE_TABLE,
             FeetechMotorsBus,
         )
 
-        return FeetechMotorsBusConfig, FeetechMotorsBus, MODEL_BAUDRATE_TABLE, SCS_SERIES_BAUDRATE_TABLE
+        return (
+            FeetechMotorsBusConfig, FeetechMotorsBus, MODEL_BAUDRATE_TABLE, SCS_SERIES_BAUDRATE_TABLE,
+            frozenset(MODEL_BAUDRATE_TABLE), MODEL_CONTROL_TABLE,
+        )
 
     elif brand == "dynamixel":
         from lerobot.common.robot_devices.motors.configs import DynamixelMotorsBusConfig
         from lerobot.common.robot_devices.motors.dynamixel import (
             MODEL_BAUDRATE_TABLE,
+            MODEL_CONTROL_TABLE,
             X_SERIES_BAUDRATE_TABLE,
             DynamixelMotorsBus,
         )
 
-        return DynamixelMotorsBusConfig, DynamixelMotorsBus, MODEL_BAUDRATE_TABLE, X_SERIES_BAUDRATE_TABLE
+        return (
+            DynamixelMotorsBusConfig, DynamixelMotorsBus, MODEL_BAUDRATE_TABLE, X_SERIES_BAUDRATE_TABLE,
+            frozenset(MODEL_BAUDRATE_TABLE), MODEL_CONTROL_TABLE,
+        )
 
     else:
         raise ValueError(
             f"Currently we do not support this motor brand: {brand}. We currently support feetech and dynamixel motors."
         )
 
-def scan_motors_on_port(port, brand, model, baudrate=1000000):
-    """Scan for motors on a specific port and return their IDs and positions."""
-    motor_bus_config_cls, motor_bus_cls, model_baudrate_table, series_baudrate_table = get_motor_bus_cls(brand)
+# Baudrates of each brand, fastest first, computed once from its series baudrate table
+_BRAND_BAUDRATES = {}
+
+def _brand_baudrates(brand, series_baudrate_table):
+    if brand not in _BRAND_BAUDRATES:
+        _BRAND_BAUDRATES[brand] = tuple(sorted(set(series_baudrate_table.values()), reverse=True))
+    return _BRAND_BAUDRATES[brand]
+
+# Ports are scanned in parallel threads, their messages are printed under a lock so lines do not mix
+_print_lock = threading.Lock()
+
+def _print(*args, **kwargs):
+    with _print_lock:
+        print(*args, **kwargs)
+
+# Row of the summary table, filled from the result of a motor
+_SUMMARY_ROW = "{port:<40} {id!s:<5} {position!s:<15} {offset!s:<10}"
+
+def _any_motor_answers(motor_bus, brand):
+    """Ping the broadcast ID and tell whether any motor answered, at the current baudrate of the bus.
+
+    One ping per baudrate instead of one per possible ID. If the broadcast ping is not supported,
+    motors are assumed to be there so the caller falls back to looking them up one by one.
+    """
+    packet_handler, port_handler = motor_bus.packet_handler, motor_bus.port_handler
+
+    if brand == "feetech":
+        import scservo_sdk as scs
+
+        # The SDK does not wait for replies to broadcast instructions, so send the ping and listen here
+        txpacket = [0] * 6
+        txpacket[scs.PKT_ID] = scs.BROADCAST_ID
+        txpacket[scs.PKT_LENGTH] = 2
+        txpacket[scs.PKT_INSTRUCTION] = scs.INST_PING
+        if packet_handler.txPacket(port_handler, txpacket) != scs.COMM_SUCCESS:
+            return True
+        port_handler.setPacketTimeout(6)  # HEADER0 HEADER1 ID LENGTH ERROR CHECKSUM
+        _, result = packet_handler.rxPacket(port_handler)
+        # The replies of several motors collide, any bytes received (even corrupt) mean motors are there
+        return result != scs.COMM_RX_TIMEOUT
+
+    import dynamixel_sdk as dxl
+
+    data, result = packet_handler.broadcastPing(port_handler)
+    if result == dxl.COMM_NOT_AVAILABLE:
+        return True
+    return result == dxl.COMM_SUCCESS and len(data) > 0
+
+def scan_motors_on_port(port, brand, model, baudrate=1000000, buf=None, timeout=None):
+    """Scan for motors on a specific port and yield their IDs and positions as they are read.
+
+    Messages are written to `buf` if given, for the caller to print them in one go, else printed.
+    If the scan takes more than `timeout` seconds, the port is closed and the scan is given up.
+    """
+    def log(message):
+        if buf is None:
+            _print(message)
+        else:
+            buf.write(message + "\n")
+    
+    (
+        motor_bus_config_cls, motor_bus_cls, _, series_baudrate_table, supported_models, model_control_table
+    ) = get_motor_bus_cls(brand)
     
     # Check if the provided model is supported
-    if model not in model_baudrate_table:
+    if model not in supported_models:
         raise ValueError(
-            f"Invalid model '{model}' for brand '{brand}'. Supported models: {list(model_baudrate_table.keys())}"
+            f"Invalid model '{model}' for brand '{brand}'. Supported models: {sorted(supported_models)}"
         )
     
+    # Only read the offset of models that have one (Feetech), rather than failing to read it
+    has_offset = "Offset" in model_control_table[model]
+    
     # Setup motor names, indices, and models - we'll use a placeholder since we're scanning
     motor_name = "scanner"
     motor_index_arbitrary = 1  # Just a placeholder ID
@@ -51,98 +132,197 @@ def scan_motors_on_port(port, brand, model, baudrate=1000000):
     # Initialize the MotorBus
     motor_bus = motor_bus_cls(config=config)
     
-    # Store results
-    results = []
+    # A broken adapter can block a read or write far beyond the packet timeout, closing the port from
+    # a watchdog makes it fail so the scan time stays bounded
+    timed_out = threading.Event()
+    
+    def abort_scan():
+        timed_out.set()
+        with contextlib.suppress(Exception):
+            motor_bus.port_handler.closePort()
+    
+    watchdog = threading.Timer(timeout, abort_scan) if timeout else None
+    
+    if watchdog is not None:
+        watchdog.start()
     
     try:
         # Connect to the motor bus
         motor_bus.connect()
-        print(f"Connected to port: {port}")
+        log(f"Connected to port: {port}")
         
-        # Scan for motors using different baudrates
-        all_baudrates = set(series_baudrate_table.values())
-        found_motors = False
+        # Scan for motors using different baudrates, the expected one first since the scan stops at
+        # the first baudrate where motors are found
+        all_baudrates = _brand_baudrates(brand, series_baudrate_table)
+        probe_order = ((baudrate,) if baudrate in all_baudrates else ()) + tuple(b for b in all_baudrates if b != baudrate)
+        
+        # The baudrate is set and the IDs are looked up without the bus helpers, which print (and draw a
+        # progress bar) straight to stdout instead of the buffered messages of the port
+        def set_baudrate(baudrate_val):
+            port_handler = motor_bus.port_handler
+            if port_handler.getBaudRate() != baudrate_val:
+                port_handler.setBaudRate(baudrate_val)
+                if port_handler.getBaudRate() != baudrate_val:
+                    raise OSError(f"Failed to set the baudrate of port {port} to {baudrate_val}.")
+        
+        def find_motors_at(baudrate_val):
+            if timed_out.is_set():
+                raise TimeoutError
+            set_baudrate(baudrate_val)
+            
+            present_ids = []
+            for motor_id in range(1, 10):
+                try:
+                    present_id = motor_bus.read_with_motor_ids([model], [motor_id], "ID", num_retry=2)[0]
+                except ConnectionError:
+                    continue
+                
+                if present_id != motor_id:
+                    raise OSError(
+                        f"Motor ID {motor_id} answered with ID {present_id} in its memory, which might be damaged."
+                    )
+                present_ids.append(motor_id)
+            return present_ids
         
-        for baudrate_val in all_baudrates:
-            motor_bus.set_bus_baudrate(baudrate_val)
-            present_ids = motor_bus.find_motor_indices(list(range(1, 10)))
+        present_ids = []
+        skipped_baudrates = []
+        for baudrate_val in probe_order:
+            if timed_out.is_set():
+                raise TimeoutError
+            
+            # Only look the motors up one by one if something answers the broadcast ping. The expected
+            # baudrate is always looked up, so motors are still found there if they ignore broadcasts
+            if baudrate_val != baudrate:
+                set_baudrate(baudrate_val)
+                if not _any_motor_answers(motor_bus, brand):
+                    skipped_baudrates.append(baudrate_val)
+                    continue
             
+            present_ids = find_motors_at(baudrate_val)
             if present_ids:
-                found_motors = True
-                print(f"Found {len(present_ids)} motors at baudrate {baudrate_val}")
+                break
+        else:
+            # The motors may not answer broadcast pings at all, look them up at the skipped baudrates too
+            for baudrate_val in skipped_baudrates:
+                present_ids = find_motors_at(baudrate_val)
+                if present_ids:
+                    break
+        
+        if present_ids:
+            log(f"Found {len(present_ids)} motors at baudrate {baudrate_val} on port {port}")
+            
+            # We found motors at this baudrate, now get their positions with the bus already open,
+            # all of them with one sync read per register
+            def read_register(data_name):
+                try:
+                    values = motor_bus.read_with_motor_ids([model] * len(present_ids), present_ids, data_name)
+                    return dict(zip(present_ids, values, strict=True))
+                except Exception:
+                    # The port was closed by the watchdog, the motors cannot be read one by one either
+                    if timed_out.is_set():
+                        raise TimeoutError from None
                 
-                # We found motors at this baudrate, now get their positions
+                # A motor does not answer, read them one by one
+                values = {}
                 for motor_id in present_ids:
                     try:
-                        # Configure the motor bus to communicate with this specific ID
-                        motor_bus_config_cls, motor_bus_cls, _, _ = get_motor_bus_cls(brand)
-                        config = motor_bus_config_cls(port=port, motors={f"motor_{motor_id}": (motor_id, model)})
-                        specific_motor_bus = motor_bus_cls(config=config)
-                        specific_motor_bus.connect()
-                        specific_motor_bus.set_bus_baudrate(baudrate_val)
-                        
-                        # Read position
-                        position = specific_motor_bus.read("Present_Position")
-                        
-                        # For Feetech motors, also read offset
-                        offset = None
-                        if brand == "feetech":
-                            try:
-                                offset = specific_motor_bus.read("Offset")
-                            except Exception:
-                                offset = "Unknown"
-                        
-                        # Store the results
-                        results.append({
-                            "port": port,
-                            "id": motor_id,
-                            "position": position,
-                            "offset": offset,
-                            "baudrate": baudrate_val
-                        })
-                        
-                        specific_motor_bus.disconnect()
+                        values[motor_id] = motor_bus.read_with_motor_ids([model], motor_id, data_name)
                     except Exception as e:
-                        print(f"Error reading motor ID {motor_id}: {e}")
-        
-        if not found_motors:
-            print(f"No motors found on port {port}")
+                        log(f"Error reading {data_name} of motor ID {motor_id} on port {port}: {e}")
+                return values
+            
+            positions = read_register("Present_Position")
+            
+            offsets = read_register("Offset") if has_offset else {}
+            if timed_out.is_set():
+                raise TimeoutError
+            
+            for motor_id in present_ids:
+                if motor_id not in positions:
+                    continue
+                
+                offset = offsets.get(motor_id, "Unknown") if has_offset else None
+                
+                yield {
+                    "port": port,
+                    "id": motor_id,
+                    "position": positions[motor_id],
+                    "offset": offset,
+                    "baudrate": baudrate_val
+                }
+        else:
+            log(f"No motors found on port {port}")
             
     except Exception as e:
-        print(f"Error scanning port {port}: {e}")
+        if timed_out.is_set():
+            log(f"Scan of port {port} timed out after {timeout}s, skipping it")
+        else:
+            log(f"Error scanning port {port}: {e}")
     
     finally:
+        if watchdog is not None:
+            watchdog.cancel()
+        
         # Always disconnect
         try:
             motor_bus.disconnect()
         except:
             pass
-    
-    return results
 
-def scan_all_motors(ports, brand, model, baudrate=1000000):
-    """Scan all specified ports for motors and print out their information."""
-    all_results = []
-    
-    for port in ports:
-        print(f"\n=== Scanning port: {port} ===")
-        results = scan_motors_on_port(port, brand, model, baudrate)
-        all_results.extend(results)
-    
-    # Print summary
-    if all_results:
-        print("\n===== Motor Connection Summary =====")
-        print("{:<40} {:<5} {:<15} {:<10}".format("Port", "ID", "Position", "Offset"))
-        print("-" * 75)
+async def scan_ports(ports, brand, model, on_result, baudrate=1000000, timeout=None):
+    """Scan the ports concurrently, calling `on_result` (from the scanning threads) with each motor found.
+
+    The ports share no hardware, so their scans overlap and the total time is the one of the slowest
+    port. The bus I/O blocks, so each scan runs in its own thread of an executor sized to the ports.
+    Each port scan is given up after `timeout` seconds. Returns the number of motors found.
+    """
+    loop = asyncio.get_running_loop()
+
+    def scan(port):
+        # The messages of the port are buffered and printed at once, before its results and at the end
+        buf = io.StringIO()
+        buf.write(f"\n=== Scanning port: {port} ===\n")
         
-        for result in all_results:
-            print("{:<40} {:<5} {:<15} {:<10}".format(
-                result["port"], 
-                result["id"], 
-                str(result["position"]), 
-                str(result["offset"]) if result["offset"] is not None else "N/A"
-            ))
-    else:
+        def flush():
+            if buf.tell():
+                with _print_lock:
+                    sys.stdout.write(buf.getvalue())
+                buf.seek(0)
+                buf.truncate()
+        
+        count = 0
+        for result in scan_motors_on_port(port, brand, model, baudrate, buf=buf, timeout=timeout):
+            flush()
+            on_result(result)
+            count += 1
+        flush()
+        return count
+
+    # A port listed twice is scanned once, it cannot be opened by two scans at the same time
+    ports = list(dict.fromkeys(ports))
+    with ThreadPoolExecutor(max_workers=max(1, min(len(ports), 32))) as executor:
+        counts = await asyncio.gather(*(loop.run_in_executor(executor, scan, port) for port in ports))
+    return sum(counts)
+
+def scan_all_motors(ports, brand, model, baudrate=1000000, timeout=None):
+    """Scan all specified ports for motors and print out their information as soon as it is read."""
+    header_printed = False
+
+    def print_result(result):
+        nonlocal header_printed
+        with _print_lock:
+            # The header comes with the first motor found
+            if not header_printed:
+                print("\n===== Motor Connection Summary =====")
+                print(_SUMMARY_ROW.format(port="Port", id="ID", position="Position", offset="Offset"))
+                print("-" * 75)
+                header_printed = True
+            
+            if result["offset"] is None:
+                result = {**result, "offset": "N/A"}
+            print(_SUMMARY_ROW.format_map(result))
+    
+    if asyncio.run(scan_ports(ports, brand, model, print_result, baudrate, timeout)) == 0:
         print("\nNo motors found on any of the specified ports.")
 
 if __name__ == "__main__":
@@ -155,7 +335,14 @@ if __name__ == "__main__":
                         help="Motor model (e.g. xl330-m077, sts3215)")
     parser.add_argument("--baudrate", type=int, default=1000000, 
                         help="Baudrate for communication (default: 1000000)")
+    parser.add_argument("--timeout", type=float, default=30.0, 
+                        help="Time budget in seconds for the scan of each port, 0 for no limit (default: 30)")
     
     args = parser.parse_args()
     
-    scan_all_motors(args.ports, args.brand, args.model, args.baudrate)
\ No newline at end of file
+    # Check the model once, before the ports are scanned in parallel
+    supported_models = get_motor_bus_cls(args.brand)[4]
+    if args.model not in supported_models:
+        parser.error(f"invalid model '{args.model}' for brand '{args.brand}' (choose from {sorted(supported_models)})")
+    
+    scan_all_motors(args.ports, args.brand, args.model, args.baudrate, args.timeout)
\ No newline at end of file